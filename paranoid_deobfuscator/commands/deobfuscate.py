@@ -12,19 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import dataclasses
+import io
 import json
 import logging
+import os
 import pathlib
-import shutil
 import sys
-from tempfile import NamedTemporaryFile
-from typing import Any, Dict, List, TypedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
 
 import click
 
 from .. import __version__ as deobfuscator_version
-from .. import constants, paranoid
-from ..encoding import decode_unicode_chunks, encode_smali_string
+from .. import paranoid
+from ..encoding import encode_smali_string
+from ..filesystem import find_smali_files
 
 logger = logging.getLogger(__name__)
 
@@ -35,49 +38,63 @@ REMOVED_COMMENT = (
 
 class ParanoidSmaliDeobfuscator:
     class ParanoidSmaliDeobfuscatorError(Exception):
-        def __init__(self, message: str, extra: Dict[str, Any] = {}):
+        def __init__(self, message: str, extra: Dict[str, Any] | None = None):
             super().__init__(message)
 
-            self.extra = extra
+            self.extra = extra or {}
+            self._str_cache: str | None = None
 
         def __str__(self):
             if not self.extra:
                 return super().__str__()
 
-            return f"{super().__str__()}\n{json.dumps(self.extra, indent=4)}"
+            # The extra information can hold every register of a method, only format it once
+            if self._str_cache is None:
+                self._str_cache = f"{super().__str__()}\n{json.dumps(self.extra, indent=4, default=repr)}"
 
-    class State(TypedDict):
-        class_name: str
-        registers: Dict[str, paranoid.register.SmaliRegister]
-        last_deobfuscated_string: str | None
+            return self._str_cache
+
+    @dataclasses.dataclass(slots=True)
+    class State:
+        class_name: str = ""
+        registers: Dict[str, paranoid.register.SmaliRegister] = dataclasses.field(default_factory=dict)
+        last_deobfuscated_string: str | None = None
 
     def __init__(
         self,
         filepath: pathlib.Path | str,
         target_method: paranoid.SmaliMethod,
-        obfuscated_chunks: List[str],
+        obfuscated_chunks: str,
+        content: str | None = None,
         # edit_in_place: bool = True,
     ):
         # if edit_in_place:
         #     self.file = open(filepath, "r+")
         # else:
         #     self.file = open(filepath, "r")
-        self.file = open(filepath, "r")
-        self.tmp_file = NamedTemporaryFile(mode="wt", dir=pathlib.Path(filepath).parent.absolute(), delete=False)
+        self.filepath = pathlib.Path(filepath)
+
+        # Content already read by the caller is parsed from memory, with the same newline handling as open()
+        if content is not None:
+            self.file = io.StringIO(content, newline=None)
+        else:
+            self.file = open(filepath, "r", encoding="utf-8")
+
+        # Output is buffered and only written back if at least one line changed
+        self.lines: List[str] = []
+        self.modified = False
 
         self.target_method = target_method
+        self._target_reference = target_method.to_reference()
+        self._target_signature = target_method.to_signature()
         self.obfuscated_chunks = obfuscated_chunks
         self._reset_state()
 
     def _reset_state(self, key_to_reset: str | None = None):
-        default_state: ParanoidSmaliDeobfuscator.State = {
-            "class_name": "",
-            "registers": {},
-            "last_deobfuscated_string": None,
-        }
+        default_state = ParanoidSmaliDeobfuscator.State()
 
         if key_to_reset:
-            self.state[key_to_reset] = default_state[key_to_reset]
+            setattr(self.state, key_to_reset, getattr(default_state, key_to_reset))
         else:
             self.state = default_state
 
@@ -95,39 +112,40 @@ class ParanoidSmaliDeobfuscator:
         self.file.close()
 
     def process(self, line: str) -> str | None:
+        # Dispatch on the first token, so unrelated lines are rejected with a few comparisons
+        opcode = line.split(None, 1)[0]
+
         # Get fully qualified class name
-        if line.startswith(".class"):
-            self.state["class_name"] = self.get_fully_qualified_class_name(line)
+        if opcode == ".class":
+            self.state.class_name = self.get_fully_qualified_class_name(line)
             return
 
         # Update registers
-        if line.startswith("const"):
+        if opcode in paranoid.instructions.CONST_OPCODES:
             try:
-                instr = paranoid.instructions.SmaliInstrConst.parse(line)
+                instr = paranoid.instructions.parse_line(line)
             except ValueError:
                 return
 
-            self.state["registers"][instr.register] = paranoid.register.SmaliRegisterConst(instr.value)
+            self.state.registers[instr.register] = paranoid.register.SmaliRegisterConst(instr.value)
             return
 
         # Search for calls to the target method
-        if line.startswith("invoke-static"):
+        if opcode == "invoke-static":
+            # A line not containing the target method reference cannot call it
+            if self._target_reference not in line:
+                return
+
             try:
-                instr = paranoid.instructions.SmaliInstrInvokeStatic.parse(line)
+                instr = paranoid.instructions.parse_line(line)
             except ValueError:
                 return
 
-            method_name, method_arguments, method_return_type = paranoid.SmaliMethod.parse_method_signature(
-                instr.method
-            )
-
-            # Check if the target method is the one we are looking for
+            # Check if the target method is the one we are looking for,
+            # its signature is compared as a whole instead of being parsed
             if not (
-                self.target_method
-                and instr.class_name == self.target_method.class_name
-                and method_name == self.target_method.method
-                and method_arguments == self.target_method.arguments
-                and method_return_type == self.target_method.return_type
+                instr.class_name == self.target_method.class_name
+                and instr.method == self._target_signature
                 and len(instr.registers) == 2
             ):
                 return
@@ -139,19 +157,19 @@ class ParanoidSmaliDeobfuscator:
                 raise ParanoidSmaliDeobfuscator.ParanoidSmaliDeobfuscatorError(
                     "Parameters are not supported",
                     extra={
-                        "registers": self.state["registers"],
+                        "registers": self.state.registers,
                         "register": first_register,
                         "line": line,
                     },
                 )
 
             # Get the value of the register
-            register_value = self.state["registers"].get(first_register)
+            register_value = self.state.registers.get(first_register)
             if not register_value:
                 raise ParanoidSmaliDeobfuscator.ParanoidSmaliDeobfuscatorError(
                     "Register not found",
                     extra={
-                        "registers": self.state["registers"],
+                        "registers": self.state.registers,
                         "register": first_register,
                         "line": line,
                     },
@@ -162,7 +180,7 @@ class ParanoidSmaliDeobfuscator:
                 raise ParanoidSmaliDeobfuscator.ParanoidSmaliDeobfuscatorError(
                     "Register is not a constant",
                     extra={
-                        "registers": self.state["registers"],
+                        "registers": self.state.registers,
                         "register": first_register,
                         "line": line,
                     },
@@ -170,20 +188,22 @@ class ParanoidSmaliDeobfuscator:
 
             # Deobfuscate the string
             deobfuscated_string = paranoid.deobfuscate_string(register_value.value, self.obfuscated_chunks, True)
-            self.state["last_deobfuscated_string"] = deobfuscated_string
+            self.state.last_deobfuscated_string = deobfuscated_string
 
             return REMOVED_COMMENT
 
         # Move result object
-        if line.startswith("move-result-object"):
+        if opcode == "move-result-object":
             try:
-                instr = paranoid.instructions.SmaliInstrMoveResult.parse(line)
+                instr = paranoid.instructions.parse_line(line)
             except ValueError:
                 return
 
-            if self.state["last_deobfuscated_string"] is not None:
-                new_line = f'    const-string {instr.register}, "{encode_smali_string(self.state["last_deobfuscated_string"])}"'
-                self.state["last_deobfuscated_string"] = None
+            if self.state.last_deobfuscated_string is not None:
+                new_line = (
+                    f'    const-string {instr.register}, "{encode_smali_string(self.state.last_deobfuscated_string)}"'
+                )
+                self.state.last_deobfuscated_string = None
                 return new_line
 
             return
@@ -193,89 +213,90 @@ class ParanoidSmaliDeobfuscator:
     def update(self, _line: str):
         line = _line.strip()
 
-        # Skip empty lines
-        if not line:
-            self.tmp_file.write(_line)
+        # Skip empty lines, comments and labels
+        if not line or line[0] in "#:":
+            self.lines.append(_line)
             return
 
         # Process the line
         updated_line = self.process(line)
         if updated_line is not None:
-            self.tmp_file.write(updated_line + "\n")
+            self.lines.append(updated_line + "\n")
+            self.modified = True
             return
 
-        # Add the line to the temporary file
-        self.tmp_file.write(_line)
+        # Keep the original line
+        self.lines.append(_line)
 
+    def save(self):
+        # Write everything to a temporary file next to the original in a single call, then replace the original file
+        # Files are read as UTF-8 with universal newlines, so they are written back as UTF-8 with "\n" line endings
+        tmp_filepath = self.filepath.with_name(self.filepath.name + ".tmp")
+        try:
+            with open(tmp_filepath, "w", encoding="utf-8", newline="\n") as tmp_file:
+                tmp_file.writelines(self.lines)
 
-@click.command(name="deobfuscate", help="Deobfuscate a paranoid obfuscated APK smali files")
-@click.argument("target", type=click.Path(exists=True, file_okay=False))
-def cli(target: str):
-    target_directory = pathlib.Path(target)
+            os.replace(tmp_filepath, self.filepath)
+        except BaseException:
+            # Do not leave a partial temporary file in the tree
+            tmp_filepath.unlink(missing_ok=True)
+            raise
 
-    # First pass: find the get string method and the obfuscated string array
-    potential_get_string_methods = []
-    potential_obfuscated_string_arrays = []
-    for smali_file in target_directory.rglob("*.smali"):
-        with open(smali_file, "r") as f:
-            smali_parser = paranoid.ParanoidSmaliParser(filename=str(smali_file))
-
-            for line in f:
-                smali_parser.update(line)
-
-            # Add potential get string methods
-            for method, data in smali_parser.methods.items():
-                if (
-                    data["consts"] == constants.PARANOID_GET_STRING_CONST_SIGNATURE
-                    and method.arguments == constants.PARANOID_GET_STRING_ARGUMENTS
-                    and method.return_type == constants.PARANOID_GET_STRING_RETURN_TYPE
-                ):
-                    potential_get_string_methods.append((method, data["sget_objects"]))
-
-            # Add potential obfuscated string arrays
-            for field, data in smali_parser.fields.items():
-                if field.type == "[Ljava/lang/String;":
-                    potential_obfuscated_string_arrays.append((field, data["value"]))
-
-    # Check if only one method is found
-    if len(potential_get_string_methods) != 1:
-        logger.error("Found more than one potential get string method")
-        logger.error("This is not supported yet")
-        sys.exit(1)
 
-    get_string_method, get_string_fields = potential_get_string_methods[0]
-    get_string_field: paranoid.SmaliField = get_string_fields[0]
+def _deobfuscate_file(smali_file: str, target_method: paranoid.SmaliMethod, chunks: str):
+    with open(smali_file, "rb") as f:
+        content = f.read()
 
-    # Check if only one field is found
-    if len(get_string_fields) != 1:
-        logger.error("Found more than one potential obfuscated string array")
-        logger.error("This is not supported yet")
-        sys.exit(1)
+    # Only files calling the target method can change, skip the others without parsing them
+    if target_method.to_reference().encode() not in content:
+        return
 
-    # Extract the string chunks
-    chunks = []
-    for field, value in potential_obfuscated_string_arrays:
-        if field.class_name == get_string_field.class_name and field.name == get_string_field.name:
-            chunks = value
+    with ParanoidSmaliDeobfuscator(smali_file, target_method, chunks, content.decode()) as deobfuscator:
+        for line in deobfuscator.file:
+            deobfuscator.update(line)
 
-    # Check if the chunks are found
-    if not chunks:
-        logger.error("No chunks found")
-        return
+    # Files without calls to the target method are left untouched
+    if deobfuscator.modified:
+        deobfuscator.save()
 
-    logger.debug(f"Method: {get_string_method}")
-    logger.debug(f"Field: {get_string_field}")
-    logger.debug("Chunks:")
-    logger.debug(chunks)
 
-    # Decode the chunks
-    chunks = decode_unicode_chunks(chunks)
+# Set once in every worker process, so the chunks are not pickled again for each file
+_worker_target_method: paranoid.SmaliMethod | None = None
+_worker_chunks: str = ""
 
-    # Second pass: deobfuscate file
-    for smali_file in target_directory.rglob("*.smali"):
-        with ParanoidSmaliDeobfuscator(smali_file, get_string_method, chunks) as deobfuscator:
-            for line in deobfuscator.file:
-                deobfuscator.update(line)
 
-        # Replace the original file with the temporary one
-        shutil.move(deobfuscator.tmp_file.name, smali_file)
+def _init_deobfuscate_worker(target_method: paranoid.SmaliMethod, chunks: str):
+    global _worker_target_method, _worker_chunks
+
+    _worker_target_method = target_method
+    _worker_chunks = chunks
+
+
+def _deobfuscate_worker(smali_file: str):
+    _deobfuscate_file(smali_file, _worker_target_method, _worker_chunks)
+
+
+@click.command(name="deobfuscate", help="Deobfuscate a paranoid obfuscated APK smali files")
+@click.argument("target", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "-j", "--jobs", type=click.IntRange(min=1), default=None, help="Number of worker processes [default: CPU count]"
+)
+def cli(target: str, jobs: int | None):
+    target_directory = pathlib.Path(target)
+
+    # Walk the tree once, both passes iterate over the same files
+    smali_files = find_smali_files(target_directory)
+
+    # First pass: find the get string method and the obfuscated string array
+    try:
+        get_string_method, chunks = paranoid.find_get_string_method(smali_files, jobs)
+    except paranoid.ParanoidNotFoundError as e:
+        logger.error(e)
+        sys.exit(1)
+
+    # Second pass: deobfuscate file
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_deobfuscate_worker, initargs=(get_string_method, chunks)
+    ) as executor:
+        for _ in executor.map(_deobfuscate_worker, smali_files, chunksize=16):
+            pass
@@ -24,5 +24,8 @@ PARANOID_GET_STRING_CONST_SIGNATURE = [
     -65536,
     0,
 ]
-PARANOID_GET_STRING_ARGUMENTS = ["J"]
+PARANOID_GET_STRING_ARGUMENTS = ("J",)
 PARANOID_GET_STRING_RETURN_TYPE = "Ljava/lang/String;"
+
+STRING_ARRAY_TYPE = "[Ljava/lang/String;"
+STRING_ARRAY_TYPE_BYTES = STRING_ARRAY_TYPE.encode()
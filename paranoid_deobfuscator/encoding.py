@@ -89,4 +89,9 @@ def encode_smali_string(data: str | bytes):
         "test\\\\\\"\\\\'"
     """
     data = data if isinstance(data, str) else bytes(data).decode()
+
+    # Printable ASCII without quotes or backslashes is already escaped
+    if data.isascii() and data.isprintable() and '"' not in data and "'" not in data and "\\" not in data:
+        return data
+
     return encode_unicode(data).replace('"', '\\"').replace("'", "\\'").replace("\\x", "\\u00")
@@ -0,0 +1,65 @@
+# Copyright 2024 Giacomo Ferretti
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pathlib
+from typing import List
+
+
+def _walk_smali_files(directories: List[str], smali_files: List[str]):
+    # Explicit stack instead of recursion, deeply nested packages cannot hit the recursion limit
+    stack = list(reversed(directories))
+    while stack:
+        # DirEntry caches the file type returned by the directory listing, no extra stat call is needed
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                # Symlinks are followed for files only, following them for directories could loop forever
+                elif entry.name.endswith(".smali") and entry.is_file():
+                    smali_files.append(entry.path)
+
+
+def _is_smali_directory_name(name: str) -> bool:
+    # apktool names the directories smali, smali_classes2, ... and smali_<dir> for dex files outside the root
+    return name == "smali" or name.startswith("smali_")
+
+
+def find_smali_files(target: pathlib.Path | str) -> List[str]:
+    """
+    Finds all the smali files of a decompiled APK.
+
+    If the target contains apktool's top level smali directory, only it and its siblings named smali_*
+    (smali_classes2, smali_assets, ...) are walked, skipping subtrees like res/, assets/ and original/.
+    Otherwise the whole target is walked.
+
+    Args:
+        target (pathlib.Path | str): The directory to search in.
+
+    Returns:
+        List[str]: The paths of the smali files found.
+    """
+    with os.scandir(target) as it:
+        smali_directories = [entry for entry in it if _is_smali_directory_name(entry.name) and entry.is_dir()]
+
+    # apktool always writes the main dex to smali, without it smali_* are packages of a smali directory target
+    if any(entry.name == "smali" for entry in smali_directories):
+        smali_directories = [entry.path for entry in smali_directories]
+    else:
+        smali_directories = [os.fspath(target)]
+
+    smali_files: List[str] = []
+    _walk_smali_files(smali_directories, smali_files)
+
+    return smali_files
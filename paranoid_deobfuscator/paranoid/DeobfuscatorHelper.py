@@ -16,39 +16,55 @@
 #  - https://github.com/MichaelRocks/paranoid/blob/7030aea9aeb8d245c3bea2ef6df20d104d198fce/core/src/main/java/io/michaelrocks/paranoid/DeobfuscatorHelper.java
 #  - https://github.com/LSPosed/LSParanoid/blob/91e1231bc0062d1f90685d739bff9bc50a2b57b0/core/src/main/java/org/lsposed/lsparanoid/DeobfuscatorHelper.java
 
+import functools
 from typing import List
 
-import numpy as np
-
 from . import RandomHelper, utils
 
 MAX_CHUNK_LENGTH = 0x1FFF
 
 
-def getString(id: int, chunks: List[str]) -> bytes:
-    _id = utils.to_int(id, 64, signed=False)
+def join_chunks(chunks: List[str]) -> str:
+    # Every chunk but the last one is MAX_CHUNK_LENGTH long, so a character index maps 1:1 on the joined string
+    return "".join(chunks)
+
+
+def getString(id: int, chunks: List[str] | str) -> bytes:
+    id = utils.to_int(id, 64, signed=False)
+
+    # Lists would have to be joined and hashed again on every call, only joined chunks go through the cache
+    if not isinstance(chunks, str):
+        return _getString(id, join_chunks(chunks))
+
+    return _cached_getString(chunks)(id)
+
+
+# Every call of a run reads the same joined chunks, the decoder built for them is reused and caches on the id alone
+@functools.lru_cache(maxsize=1)
+def _cached_getString(chunks: str):
+    # The same id is usually referenced from many call sites, decode it only once
+    return functools.lru_cache(maxsize=4096)(functools.partial(_getString, chunks=chunks))
+
 
-    with np.errstate(over="ignore"):
-        state = RandomHelper.seed(_id & 0xFFFFFFFF)
-        state = RandomHelper.next(state)
-        low = np.uint64(state) >> 32 & 0xFFFF
-        state = RandomHelper.next(state)
-        high = np.uint64(state) >> 16 & 0xFFFF0000
-        index = (_id >> 32) ^ low ^ high
-        state = getCharAt(index, chunks, state)
-        length = np.uint64(state) >> 32 & 0xFFFF
+def _getString(id: int, chunks: str) -> bytes:
+    state = RandomHelper.seed(id & 0xFFFFFFFF)
+    state = RandomHelper.next(state)
+    low = state >> 32 & 0xFFFF
+    state = RandomHelper.next(state)
+    high = state >> 16 & 0xFFFF0000
+    index = ((id >> 32) ^ low ^ high) & 0xFFFFFFFF
+    state = getCharAt(index, chunks, state)
+    length = state >> 32 & 0xFFFF
 
-        output = []
-        for x in range(length):
-            state = getCharAt(index + x + 1, chunks, state)
-            output.append(np.uint64(state) >> 32 & 0xFFFF)
+    output = []
+    for x in range(length):
+        state = getCharAt(index + x + 1, chunks, state)
+        output.append(state >> 32 & 0xFFFF)
 
-        return "".join(map(chr, output)).encode("unicode-escape")
+    return "".join(map(chr, output)).encode("unicode-escape")
 
 
-def getCharAt(char_index, chunks, state):
+def getCharAt(char_index, chunks: str, state):
     next_state = RandomHelper.next(state)
-    chunk = chunks[int(char_index / MAX_CHUNK_LENGTH)]
-    char = chunk[int(char_index % MAX_CHUNK_LENGTH)]
 
-    return np.int64(np.uint64(next_state) ^ (np.uint64(ord(char)) << np.uint16(32)))
+    return next_state ^ (ord(chunks[char_index]) << 32)
@@ -12,10 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import dataclasses
+import io
 import json
 import logging
-from typing import Any, Dict, List, Literal, TypedDict, overload
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Literal, Tuple, overload
 
+from .. import constants
+from ..encoding import decode_unicode_chunks
 from ..smali import SmaliField, SmaliMethod, instructions, register
 from . import DeobfuscatorHelper, RandomHelper
 
@@ -35,18 +41,31 @@ class ParanoidSmaliParserError(Exception):
 
     Methods:
         __str__(): Returns the string representation of the error, including any extra information if available.
+            The representation is built on first use and cached, values that are not JSON serializable are
+            formatted with repr().
     """
 
-    def __init__(self, message: str, extra: Dict[str, Any] = {}):
+    def __init__(self, message: str, extra: Dict[str, Any] | None = None):
         super().__init__(message)
 
-        self.extra = extra
+        self.extra = extra or {}
+        self._str_cache: str | None = None
 
     def __str__(self):
         if not self.extra:
             return super().__str__()
 
-        return f"{super().__str__()}\n{json.dumps(self.extra, indent=4)}"
+        # The extra information can hold every register of a method, only format it once
+        if self._str_cache is None:
+            self._str_cache = f"{super().__str__()}\n{json.dumps(self.extra, indent=4, default=repr)}"
+
+        return self._str_cache
+
+
+class ParanoidNotFoundError(Exception):
+    """
+    Exception raised when the get string method or its obfuscated string chunks cannot be found.
+    """
 
 
 class ParanoidSmaliParser:
@@ -74,33 +93,36 @@ class ParanoidSmaliParser:
             Updates the parser state based on the given line of Smali code.
     """
 
-    class Field(TypedDict):
+    @dataclasses.dataclass(slots=True)
+    class Field:
         """
-        A TypedDict representing a field with a value and an optional register.
+        A dataclass representing a field with a value and an optional register.
 
         Attributes:
             value (Any): The value of the field.
             _register (str | None): An optional register associated with the field.
         """
 
-        value: Any
-        _register: str | None
+        value: Any = None
+        _register: str | None = None
 
-    class Method(TypedDict):
+    @dataclasses.dataclass(slots=True)
+    class Method:
         """
-        A TypedDict representing a method with constants and static get objects.
+        A dataclass representing a method with constants and static get objects.
 
         Attributes:
             consts (List[int]): A list of integer constants used in the method.
             sget_objects (List[SmaliField]): A list of static get objects represented by SmaliField instances.
         """
 
-        consts: List[int]
-        sget_objects: List[SmaliField]
+        consts: List[int] = dataclasses.field(default_factory=list)
+        sget_objects: List[SmaliField] = dataclasses.field(default_factory=list)
 
-    class State(TypedDict):
+    @dataclasses.dataclass(slots=True)
+    class State:
         """
-        State is a TypedDict that represents the state of the deobfuscation process.
+        State is a dataclass that represents the state of the deobfuscation process.
 
         Attributes:
             in_method (bool): Indicates if the current context is within a method.
@@ -110,20 +132,42 @@ class ParanoidSmaliParser:
             calls_to_target_method (List[Any]): A list of calls to the target method.
         """
 
-        in_method: bool
-        in_static_constructor: bool
-        current_method: SmaliMethod | None
-        registers: Dict[str, register.SmaliRegister]
-        calls_to_target_method: List[Any]
+        in_method: bool = False
+        in_static_constructor: bool = False
+        current_method: SmaliMethod | None = None
+        registers: Dict[str, register.SmaliRegister] = dataclasses.field(default_factory=dict)
+        calls_to_target_method: List[Any] = dataclasses.field(default_factory=list)
 
     def __init__(self, *, filename: str, target_method: SmaliMethod | None = None):
         self.class_name: str | None = None
         self.fields: Dict[SmaliField, ParanoidSmaliParser.Field] = {}
         self.methods: Dict[SmaliMethod, ParanoidSmaliParser.Method] = {}
 
+        # Reverse index of Field._register, avoids scanning every field when a register is overwritten
+        self._fields_by_register: Dict[str, List[SmaliField]] = {}
+        # First field declared with each name, avoids scanning every field on sput-object
+        self._fields_by_name: Dict[str, SmaliField] = {}
+
         self.target_method = target_method
+        self._target_reference = target_method.to_reference() if target_method else None
+        self._target_signature = target_method.to_signature() if target_method else None
         self._metadata = filename
 
+        # Handlers keyed by the first token of a line, a single dict lookup selects the one to run
+        self._handlers: Dict[str, Callable[[str, List[str], int | None], None]] = {
+            ".class": self._handle_class,
+            ".field": self._handle_field,
+            ".method": self._handle_method,
+            ".end": self._handle_end,
+            **{opcode: self._handle_const_string for opcode in instructions.CONST_STRING_OPCODES},
+            **{opcode: self._handle_const for opcode in instructions.CONST_OPCODES},
+            "sget-object": self._handle_sget_object,
+            "new-array": self._handle_new_array,
+            "sput-object": self._handle_sput_object,
+            "aput-object": self._handle_aput_object,
+            "invoke-static": self._handle_invoke_static,
+        }
+
         self._reset_state()
 
     def _reset_state(self, key_to_reset: str | None = None):
@@ -136,16 +180,10 @@ class ParanoidSmaliParser:
         Args:
             key_to_reset (str | None): The specific key in the state to reset. If None, the entire state is reset.
         """
-        default_state: ParanoidSmaliParser.State = {
-            "in_method": False,
-            "current_method": None,
-            "in_static_constructor": False,
-            "registers": {},
-            "calls_to_target_method": [],
-        }
+        default_state = ParanoidSmaliParser.State()
 
         if key_to_reset:
-            self.state[key_to_reset] = default_state[key_to_reset]
+            setattr(self.state, key_to_reset, getattr(default_state, key_to_reset))
         else:
             self.state = default_state
 
@@ -168,16 +206,31 @@ class ParanoidSmaliParser:
 
         return line.split()[-1]
 
-    def update(self, line: str):
+    def _flush_array_register(self, register_name: str):
+        """
+        Copies the value of an array register to the fields it was stored into.
+
+        Args:
+            register_name (str): The register about to be overwritten.
+        """
+        current_value = self.state.registers.get(register_name, None)
+        if current_value is None or not isinstance(current_value, register.SmaliRegisterArray):
+            return
+
+        for field in self._fields_by_register.get(register_name, ()):
+            self.fields[field].value = current_value.value
+
+    def update(self, line: str, line_num: int | None = None):
         """
         Updates the internal state based on the provided Smali code line.
 
         Args:
             line (str): A single line of Smali code to be processed.
+            line_num (int | None): The line number, only used to give context to errors.
 
         The method performs the following actions based on the content of the line:
             - Strips leading and trailing whitespace from the line.
-            - Skips empty lines.
+            - Skips empty lines, comments and labels.
             - Parses and updates the class name if the line defines a class.
             - Parses and updates fields if the line defines a field.
             - Parses and updates methods if the line defines a method.
@@ -192,245 +245,377 @@ class ParanoidSmaliParser:
         """
         line = line.strip()
 
-        # Skip empty lines
-        if not line:
+        # Skip empty lines, comments and labels
+        if not line or line[0] in "#:":
             return
 
-        # Get fully qualified class name
-        if line.startswith(".class"):
-            self.class_name = self.get_fully_qualified_class_name(line)
+        # Split the line once, directive handlers reuse the tokens
+        parts = line.split()
+
+        handler = self._handlers.get(parts[0])
+        if handler is not None:
+            handler(line, parts, line_num)
+
+    def _handle_class(self, line: str, parts: List[str], line_num: int | None):
+        """Gets the fully qualified class name."""
+        self.class_name = sys.intern(parts[-1])
+
+    def _handle_field(self, line: str, parts: List[str], line_num: int | None):
+        """Parses a field definition."""
+        field = SmaliField.from_parts(parts, self.class_name)
+        self.fields[field] = ParanoidSmaliParser.Field()
+        self._fields_by_name.setdefault(field.name, field)
+
+    def _handle_method(self, line: str, parts: List[str], line_num: int | None):
+        """Parses a method definition and enters it."""
+        method = SmaliMethod.from_parts(parts, self.class_name)
+        self.methods[method] = ParanoidSmaliParser.Method()
+        self.state.in_method = True
+        self.state.current_method = method
+        # logger.debug(f"{line} # -> Entering method")
+
+        # Check if we are in a static constructor
+        if "static" in method.modifiers and "constructor" in method.modifiers and method.method == "<clinit>":
+            self.state.in_static_constructor = True
+            # logger.debug(f"{line} # -> Entering static constructor")
+
+    def _handle_end(self, line: str, parts: List[str], line_num: int | None):
+        """Exits the current method."""
+        if len(parts) < 2 or parts[1] != "method":
             return
 
-        # Parse fields
-        if line.startswith(".field"):
-            field = SmaliField.from_string(line, self.class_name)
-            self.fields[field] = {
-                "value": None,
-                "_register": None,
-            }
+        self.state.in_method = False
+        self.state.in_static_constructor = False
+        # logger.debug(f"{line} # -> Exiting method")
+
+    def _handle_const_string(self, line: str, parts: List[str], line_num: int | None):
+        """Updates a register with a constant string."""
+        try:
+            instr = instructions.parse_line(line)
+        except ValueError:
             return
 
-        # Parse methods
-        if line.startswith(".method"):
-            method = SmaliMethod.from_string(line, self.class_name)
-            self.methods[method] = {
-                "consts": [],
-                "sget_objects": [],
-            }
-            self.state["in_method"] = True
-            self.state["current_method"] = method
-            # logger.debug(f"{line} # -> Entering method")
-
-            # Check if we are in a static constructor
-            if "static" in method.modifiers and "constructor" in method.modifiers and method.method == "<clinit>":
-                self.state["in_static_constructor"] = True
-                # logger.debug(f"{line} # -> Entering static constructor")
+        # If the register is an array, update the associated field value
+        self._flush_array_register(instr.register)
 
+        self.state.registers[instr.register] = register.SmaliRegisterString(instr.value)
+
+    def _handle_const(self, line: str, parts: List[str], line_num: int | None):
+        """Updates a register with a constant and records it in the current method."""
+        try:
+            instr = instructions.parse_line(line)
+        except ValueError:
             return
 
-        if line.startswith(".end method"):
-            self.state["in_method"] = False
-            self.state["in_static_constructor"] = False
-            # logger.debug(f"{line} # -> Exiting method")
+        # If the register is an array, update the associated field value
+        self._flush_array_register(instr.register)
+
+        # Add const to method consts
+        if self.state.current_method:
+            self.methods[self.state.current_method].consts.append(instr.value)
+
+        self.state.registers[instr.register] = register.SmaliRegisterConst(instr.value)
+
+    def _handle_sget_object(self, line: str, parts: List[str], line_num: int | None):
+        """Records the static fields read by the current method."""
+        if not self.state.in_method:
             return
 
-        # Update registers
-        if line.startswith("const-string"):
-            try:
-                instr = instructions.SmaliInstrConstString.parse(line)
-            except ValueError:
-                return
-
-            # If the register is an array, update the associated field value
-            current_value = self.state["registers"].get(instr.register, None)
-            if current_value is not None and isinstance(current_value, register.SmaliRegisterArray):
-                for field, data in self.fields.items():
-                    if data["_register"] == instr.register:
-                        self.fields[field]["value"] = self.state["registers"][instr.register].value
-
-            self.state["registers"][instr.register] = register.SmaliRegisterString(instr.value)
+        try:
+            instr = instructions.parse_line(line)
+        except ValueError:
             return
 
-        if line.startswith("const"):
-            try:
-                instr = instructions.SmaliInstrConst.parse(line)
-            except ValueError:
-                return
+        field = SmaliField(instr.field_name, instr.field_type, [], instr.class_name)
 
-            # If the register is an array, update the associated field value
-            current_value = self.state["registers"].get(instr.register, None)
-            if current_value is not None and isinstance(current_value, register.SmaliRegisterArray):
-                for field, data in self.fields.items():
-                    if data["_register"] == instr.register:
-                        self.fields[field]["value"] = self.state["registers"][instr.register].value
+        if self.state.current_method:
+            self.methods[self.state.current_method].sget_objects.append(field)
 
-            # Add const to method consts
-            if self.state["current_method"]:
-                self.methods[self.state["current_method"]]["consts"].append(instr.value)
+    def _handle_new_array(self, line: str, parts: List[str], line_num: int | None):
+        """Creates a String[] array in a register."""
+        try:
+            instr = instructions.parse_line(line)
+        except ValueError:
+            return
 
-            self.state["registers"][instr.register] = register.SmaliRegisterConst(instr.value)
+        # Skip array other than [Ljava/lang/String;
+        # Necessary for speed
+        if instr.type_descriptor != "[Ljava/lang/String;":
             return
 
-        if line.startswith("sget-object"):
-            if not self.state["in_method"]:
-                return
-
-            try:
-                instr = instructions.SmaliInstrSGetSPut.parse(line)
-            except ValueError:
-                return
-
-            field = SmaliField(instr.field_name, instr.field_type, [], instr.class_name)
-
-            if self.state["current_method"]:
-                self.methods[self.state["current_method"]]["sget_objects"].append(field)
-
-        # Create array
-        if line.startswith("new-array"):
-            try:
-                instr = instructions.SmaliInstrNewArray.parse(line)
-            except ValueError:
-                return
-
-            # Skip array other than [Ljava/lang/String;
-            # Necessary for speed
-            if instr.type_descriptor != "[Ljava/lang/String;":
-                return
-
-            # Get size from register
-            if instr.size_register not in self.state["registers"]:
-                return
-
-            size_register = self.state["registers"][instr.size_register]
-            # Check if size_register is instance of SmaliRegisterConst
-            if not isinstance(size_register, register.SmaliRegisterConst):
-                logger.debug(self._metadata)
-                logger.debug(line)
-                logger.debug(f"Size register {instr.size_register} is not a const")
-                logger.debug(f" - Class: {size_register.__class__}")
-                return
-
-            self.state["registers"][instr.register] = register.SmaliRegisterArray([None] * size_register.get_value())
+        # Get size from register
+        if instr.size_register not in self.state.registers:
             return
 
-        # Put value in field
-        if line.startswith("sput-object"):
-            try:
-                instr = instructions.SmaliInstrSGetSPut.parse(line)
-            except ValueError:
-                return
+        size_register = self.state.registers[instr.size_register]
+        # Check if size_register is instance of SmaliRegisterConst
+        if not isinstance(size_register, register.SmaliRegisterConst):
+            logger.debug(self._metadata)
+            logger.debug(line)
+            logger.debug("Size register %s is not a const", instr.size_register)
+            logger.debug(" - Class: %s", size_register.__class__)
+            return
 
-            # Check if the field is in the current class
-            if instr.class_name != self.class_name:
-                return
+        self.state.registers[instr.register] = register.SmaliRegisterArray([None] * size_register.get_value())
 
-            # Get the field with the matching name
-            field = next((f for f in self.fields if f.name == instr.field_name), None)
-            if field is None:
-                return
+    def _handle_sput_object(self, line: str, parts: List[str], line_num: int | None):
+        """Associates a field of the current class with the register stored into it."""
+        try:
+            instr = instructions.parse_line(line)
+        except ValueError:
+            return
 
-            # Save the register and the last value
-            self.fields[field]["_register"] = instr.register_dest
+        # Check if the field is in the current class
+        if instr.class_name != self.class_name:
             return
 
-        # Insert value in array
-        if line.startswith("aput-object"):
-            try:
-                instr = instructions.SmaliInstrAGetAPut.parse(line)
-            except ValueError:
-                return
-
-            # Check if arguments are in the registers
-            if (
-                instr.register_array not in self.state["registers"]
-                or instr.register_index not in self.state["registers"]
-                or instr.register_dest not in self.state["registers"]
-            ):
-                return
-
-            array = self.state["registers"][instr.register_array]
-            index = self.state["registers"][instr.register_index]
-            value = self.state["registers"][instr.register_dest]
-
-            # Check if the array_register is an array
-            if not isinstance(array, register.SmaliRegisterArray):
-                return
-
-            # Check if the value is a const-string
-            if not isinstance(value, register.SmaliRegisterString):
-                logger.warning(f"Value register {instr.register_dest} is not a string")
-                logger.warning("Not supported yet")
-                return
-
-            # Check if the index is a const
-            if not isinstance(index, register.SmaliRegisterConst):
-                logger.warning(f"Index register {instr.register_index} is not a const")
-                return
-
-            # Append the value to the array
-            array.value[index.value] = value.value
+        # Get the field with the matching name
+        field = self._fields_by_name.get(instr.field_name)
+        if field is None:
             return
 
-        if line.startswith("invoke-static"):
-            try:
-                instr = instructions.SmaliInstrInvokeStatic.parse(line)
-            except ValueError:
-                return
-
-            method_name, method_arguments, method_return_type = SmaliMethod.parse_method_signature(instr.method)
-
-            # Check if the target method is the one we are looking for
-            if not (
-                self.target_method
-                and instr.class_name == self.target_method.class_name
-                and method_name == self.target_method.method
-                and method_arguments == self.target_method.arguments
-                and method_return_type == self.target_method.return_type
-                and len(instr.registers) == 2
-            ):
-                return
-
-            first_register = instr.registers[0]
-
-            # TODO: parameters are not supported
-            if first_register.startswith("p"):
-                raise ParanoidSmaliParserError(
-                    "Parameters are not supported",
-                    extra={
-                        "registers": self.state["registers"],
-                        "register": first_register,
-                        "line": line,
-                    },
-                )
-
-            try:
-                self.state["calls_to_target_method"].append(self.state["registers"][first_register])
-            except KeyError:
-                raise ParanoidSmaliParserError(
-                    "Register not found",
-                    extra={
-                        "registers": self.state["registers"],
-                        "register": first_register,
-                        "line": line,
-                    },
-                )
+        # Save the register and the last value
+        previous_register = self.fields[field]._register
+        if previous_register is not None:
+            self._fields_by_register[previous_register].remove(field)
+
+        self.fields[field]._register = instr.register_dest
+        self._fields_by_register.setdefault(instr.register_dest, []).append(field)
 
+    def _handle_aput_object(self, line: str, parts: List[str], line_num: int | None):
+        """Inserts a constant string in an array register."""
+        try:
+            instr = instructions.parse_line(line)
+        except ValueError:
             return
 
+        # Check if arguments are in the registers
+        if (
+            instr.register_array not in self.state.registers
+            or instr.register_index not in self.state.registers
+            or instr.register_dest not in self.state.registers
+        ):
+            return
+
+        array = self.state.registers[instr.register_array]
+        index = self.state.registers[instr.register_index]
+        value = self.state.registers[instr.register_dest]
+
+        # Check if the array_register is an array
+        if not isinstance(array, register.SmaliRegisterArray):
+            return
+
+        # Check if the value is a const-string
+        if not isinstance(value, register.SmaliRegisterString):
+            logger.warning("Value register %s is not a string", instr.register_dest)
+            logger.warning("Not supported yet")
+            return
+
+        # Check if the index is a const
+        if not isinstance(index, register.SmaliRegisterConst):
+            logger.warning("Index register %s is not a const", instr.register_index)
+            return
+
+        # Append the value to the array
+        array.value[index.value] = value.value
+
+    def _handle_invoke_static(self, line: str, parts: List[str], line_num: int | None):
+        """Collects the value passed to the target method."""
+        # Calls are only collected when looking for a target method,
+        # and a line not containing its reference cannot call it
+        if self._target_reference is None or self._target_reference not in line:
+            return
+
+        try:
+            instr = instructions.parse_line(line)
+        except ValueError:
+            return
+
+        # Check if the target method is the one we are looking for,
+        # its signature is compared as a whole instead of being parsed
+        if not (
+            instr.class_name == self.target_method.class_name
+            and instr.method == self._target_signature
+            and len(instr.registers) == 2
+        ):
+            return
+
+        first_register = instr.registers[0]
+
+        # TODO: parameters are not supported
+        if first_register.startswith("p"):
+            raise ParanoidSmaliParserError(
+                "Parameters are not supported",
+                extra={
+                    "registers": self.state.registers,
+                    "register": first_register,
+                    "line": line,
+                    "line_num": line_num,
+                },
+            )
+
+        try:
+            register_value = self.state.registers[first_register]
+        except KeyError:
+            raise ParanoidSmaliParserError(
+                "Register not found",
+                extra={
+                    "registers": self.state.registers,
+                    "register": first_register,
+                    "line": line,
+                    "line_num": line_num,
+                },
+            )
+
+        # Every call is collected exactly once
+        self.state.calls_to_target_method.append(register_value)
+
+
+def find_candidates(
+    smali_file: str,
+) -> Tuple[List[Tuple[SmaliMethod, List[SmaliField]]], List[Tuple[SmaliField, Any]]]:
+    """
+    Parses a Smali file looking for Paranoid's get string method and obfuscated string arrays.
+
+    Args:
+        smali_file (str): The path of the Smali file to parse.
+
+    Returns:
+        Tuple[List[Tuple[SmaliMethod, List[SmaliField]]], List[Tuple[SmaliField, Any]]]: The potential get string
+            methods with the fields they read, and the potential obfuscated string arrays with their values.
+    """
+    potential_get_string_methods = []
+    potential_obfuscated_string_arrays = []
+
+    with open(smali_file, "rb") as f:
+        data = f.read()
+
+    # Both the get string method and the obfuscated string array reference a String[] field,
+    # skip parsing files that cannot contain either of them, without decoding them
+    if constants.STRING_ARRAY_TYPE_BYTES not in data:
+        return potential_get_string_methods, potential_obfuscated_string_arrays
+
+    smali_parser = ParanoidSmaliParser(filename=smali_file)
+
+    # Split lines like the deobfuscation pass does, splitlines() would also break string literals on
+    # characters such as U+2028 or \x1c
+    for line_num, line in enumerate(io.StringIO(data.decode(), newline=None), 1):
+        smali_parser.update(line, line_num)
+
+    # Add potential get string methods
+    for method, method_data in smali_parser.methods.items():
+        if (
+            method_data.consts == constants.PARANOID_GET_STRING_CONST_SIGNATURE
+            and method.arguments == constants.PARANOID_GET_STRING_ARGUMENTS
+            and method.return_type == constants.PARANOID_GET_STRING_RETURN_TYPE
+        ):
+            potential_get_string_methods.append((method, method_data.sget_objects))
+
+    # Add potential obfuscated string arrays
+    for field, field_data in smali_parser.fields.items():
+        if field.type == constants.STRING_ARRAY_TYPE:
+            potential_obfuscated_string_arrays.append((field, field_data.value))
+
+    return potential_get_string_methods, potential_obfuscated_string_arrays
+
+
+def find_calls_to_target_method(smali_file: str, target_method: SmaliMethod) -> List[Any]:
+    """
+    Parses a Smali file collecting the register values passed to the target method.
+
+    Args:
+        smali_file (str): The path of the Smali file to parse.
+        target_method (SmaliMethod): The method to look for.
+
+    Returns:
+        List[Any]: The values of the first register of every call to the target method.
+    """
+    with open(smali_file, "rb") as f:
+        data = f.read()
+
+    # Only files containing the target method reference can call it, skip parsing the others
+    if target_method.to_reference().encode() not in data:
+        return []
+
+    smali_parser = ParanoidSmaliParser(filename=smali_file, target_method=target_method)
+
+    # Split lines like the deobfuscation pass does, see find_candidates()
+    for line_num, line in enumerate(io.StringIO(data.decode(), newline=None), 1):
+        smali_parser.update(line, line_num)
+
+    return smali_parser.state.calls_to_target_method
+
+
+def find_get_string_method(smali_files: List[str], jobs: int | None = None) -> Tuple[SmaliMethod, str]:
+    """
+    Finds Paranoid's get string method and the obfuscated string chunks it reads.
+
+    Args:
+        smali_files (List[str]): The paths of the Smali files to search.
+        jobs (int | None): The number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+        Tuple[SmaliMethod, str]: The get string method, and its decoded chunks joined into a single string.
+
+    Raises:
+        ParanoidNotFoundError: If there is not exactly one get string method reading exactly one field,
+            or if no chunks are found for that field.
+    """
+    potential_get_string_methods = []
+    potential_obfuscated_string_arrays = []
+
+    # Parsing is CPU bound and the regex engine holds the GIL, so files are spread across processes
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for methods, arrays in executor.map(find_candidates, smali_files, chunksize=16):
+            potential_get_string_methods.extend(methods)
+            potential_obfuscated_string_arrays.extend(arrays)
+
+    if len(potential_get_string_methods) != 1:
+        raise ParanoidNotFoundError(
+            f"Found {len(potential_get_string_methods)} potential get string methods, only one is supported"
+        )
+
+    get_string_method, get_string_fields = potential_get_string_methods[0]
+
+    if len(get_string_fields) != 1:
+        raise ParanoidNotFoundError(
+            f"Found {len(get_string_fields)} potential obfuscated string arrays, only one is supported"
+        )
+
+    get_string_field: SmaliField = get_string_fields[0]
+
+    # Extract the string chunks
+    chunks = []
+    for field, value in potential_obfuscated_string_arrays:
+        if field.class_name == get_string_field.class_name and field.name == get_string_field.name:
+            chunks = value
+
+    if not chunks:
+        raise ParanoidNotFoundError("No chunks found")
+
+    logger.debug("Method: %s", get_string_method)
+    logger.debug("Field: %s", get_string_field)
+    logger.debug("Chunks:")
+    logger.debug(chunks)
+
+    # Decode and join the chunks once, every string is then read from the same buffer
+    return get_string_method, DeobfuscatorHelper.join_chunks(decode_unicode_chunks(chunks))
+
 
 @overload
-def deobfuscate_string(id: int, chunks: List[str]) -> bytes: ...
+def deobfuscate_string(id: int, chunks: List[str] | str) -> bytes: ...
 @overload
-def deobfuscate_string(id: int, chunks: List[str], decode: Literal[False]) -> bytes: ...
+def deobfuscate_string(id: int, chunks: List[str] | str, decode: Literal[False]) -> bytes: ...
 @overload
-def deobfuscate_string(id: int, chunks: List[str], decode: Literal[True]) -> str: ...
-def deobfuscate_string(id: int, chunks: List[str], decode: bool = False):
+def deobfuscate_string(id: int, chunks: List[str] | str, decode: Literal[True]) -> str: ...
+def deobfuscate_string(id: int, chunks: List[str] | str, decode: bool = False):
     """
     Deobfuscates a string based on the provided identifier and chunks.
 
     Args:
         id (int): The identifier for the string to be deobfuscated.
-        chunks (List[str]): A list of string chunks used for deobfuscation.
+        chunks (List[str] | str): A list of string chunks used for deobfuscation, or the chunks already joined
+            with DeobfuscatorHelper.join_chunks to avoid joining them again on every call.
         decode (bool, optional): If True, the result will be decoded to a string. Defaults to False.
 
     Returns:
@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import numpy as np
+# Bit size -> (min value, max value)
+# Values are accepted if they fit in either the signed or the unsigned integer
+_INT_BOUNDS = {bit_size: (-(1 << (bit_size - 1)), (1 << bit_size) - 1) for bit_size in (8, 16, 32, 64)}
 
 
-def to_int(num: np.integer | int, bit_size: int = 32, signed: bool = True) -> np.integer:
+def to_int(num: int, bit_size: int = 32, signed: bool = True) -> int:
     """
-    Convert a number to a numpy integer of a specified bit size and sign.
+    Convert a number to an integer of a specified bit size and sign.
 
     Parameters:
         num (int): The number to convert.
@@ -25,53 +27,23 @@ def to_int(num: np.integer | int, bit_size: int = 32, signed: bool = True) -> np
         signed (bool, optional): Whether the integer should be signed or unsigned. Default is True.
 
     Returns:
-        np.integer: The converted numpy integer.
+        int: The converted integer, negative numbers are wrapped to their two's complement if unsigned.
 
     Raises:
         ValueError: If the bit size is not one of 8, 16, 32, or 64.
         ValueError: If the number is out of range for the specified bit size.
     """
-    if bit_size not in (8, 16, 32, 64):
+    if bit_size not in _INT_BOUNDS:
         raise ValueError("Invalid bit size. Must be 8, 16, 32, or 64.")
 
-    if not (0 <= num <= 2**bit_size - 1 or -(2 ** (bit_size - 1)) <= num < 2 ** (bit_size - 1)):
+    min_value, max_value = _INT_BOUNDS[bit_size]
+
+    if not min_value <= num <= max_value:
         raise ValueError(f"Number out of range for {bit_size}-bit integer.")
 
-    if signed:
-        if num < 0:
-            if bit_size == 8:
-                return np.int8(num)
-            elif bit_size == 16:
-                return np.int16(num)
-            elif bit_size == 32:
-                return np.int32(num)
-            elif bit_size == 64:
-                return np.int64(num)
-        else:
-            if bit_size == 8:
-                return np.uint8(num).view(np.uint8)
-            elif bit_size == 16:
-                return np.uint16(num).view(np.uint16)
-            elif bit_size == 32:
-                return np.uint32(num).view(np.uint32)
-            elif bit_size == 64:
-                return np.uint64(num).view(np.uint64)
-    else:
-        if num < 0:
-            if bit_size == 8:
-                return np.int8(num).view(np.uint8)
-            elif bit_size == 16:
-                return np.int16(num).view(np.uint16)
-            elif bit_size == 32:
-                return np.int32(num).view(np.uint32)
-            elif bit_size == 64:
-                return np.int64(num).view(np.uint64)
-        else:
-            if bit_size == 8:
-                return np.uint8(num)
-            elif bit_size == 16:
-                return np.uint16(num)
-            elif bit_size == 32:
-                return np.uint32(num)
-            elif bit_size == 64:
-                return np.uint64(num)
+    # Non negative numbers are always in range, negative ones only need wrapping if unsigned
+    if num >= 0 or signed:
+        return num
+
+    # The maximum unsigned value is also the mask of the integer
+    return num & max_value
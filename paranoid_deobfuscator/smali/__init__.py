@@ -12,30 +12,81 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any
+import functools
+import re
+import sys
+from typing import Any, Iterable
 
+# A single type descriptor: an optional array prefix followed by a fully qualified class name or a primitive
+TYPE_DESCRIPTOR = re.compile(r"\[*(?:L[^;]*;|[VZBSCIJFD])")
+
+
+def _intern_modifiers(modifiers: Iterable[str]):
+    # Modifiers come from a tiny vocabulary, interning them makes membership tests identity checks
+    return tuple(sys.intern(x) for x in modifiers)
+
+
+class _CachedHash:
+    # Fields and methods are used as dictionary keys, subclasses set _hash once in __init__
+    # Parsers create one instance per field and method, subclasses declare __slots__ to avoid a dictionary for each
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Defining __eq__ sets __hash__ to None on the subclass, put the cached one back
+        cls.__hash__ = _CachedHash.__hash__
+
+    def _compute_hash(self):
+        raise NotImplementedError
+
+    def __hash__(self):
+        return self._hash
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name != "_hash"}
+
+    def __setstate__(self, state: dict[str, Any]):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+        # String hashes differ between processes, recompute the cached hash after unpickling
+        self._hash = self._compute_hash()
+
+
+class SmaliField(_CachedHash):
+    __slots__ = ("name", "type", "modifiers", "class_name", "init_value", "_hash")
 
-class SmaliField:
     def __init__(
         self,
         name: str,
         type: str,
-        modifiers: list[str] = [],
+        modifiers: Iterable[str] = (),
         class_name: str | None = None,
         init_value: str | None = None,
     ):
         self.name = name
         self.type = type
-        self.modifiers = modifiers
+        self.modifiers = _intern_modifiers(modifiers)
         self.class_name = class_name
         self.init_value = init_value
 
+        self._hash = self._compute_hash()
+
+    def _compute_hash(self):
+        return hash((self.name, self.type, self.modifiers, self.class_name, self.init_value))
+
     @classmethod
     def from_string(cls, data: str, class_name: str | None = None):
         if not data.startswith(".field"):
             raise ValueError("Invalid field string")
 
-        parts = data.split()
+        return cls.from_parts(data.split(), class_name)
+
+    @classmethod
+    def from_parts(cls, parts: list[str], class_name: str | None = None):
+        if not parts or parts[0] != ".field":
+            raise ValueError("Invalid field string")
 
         # Check if the field has value
         init_value = None
@@ -46,6 +97,11 @@ class SmaliField:
         field_modifiers = parts[1:-1]
         field_name, field_type = parts[-1].split(":")
 
+        # Descriptors repeat across every class, share a single string for each of them
+        field_type = sys.intern(field_type)
+        if class_name is not None:
+            class_name = sys.intern(class_name)
+
         return cls(field_name, field_type, field_modifiers, class_name, init_value)
 
     def to_smali(self):
@@ -69,82 +125,74 @@ class SmaliField:
             and self.init_value == other.init_value
         )
 
-    def __hash__(self):
-        return hash((self.name, self.type, tuple(self.modifiers), self.class_name, self.init_value))
 
+class SmaliMethod(_CachedHash):
+    __slots__ = ("method", "arguments", "return_type", "modifiers", "class_name", "_hash")
 
-class SmaliMethod:
     def __init__(
         self,
         method: str,
-        arguments: list[str] = [],
+        arguments: Iterable[str] = (),
         return_type: str = "V",
-        modifiers: list[str] = [],
+        modifiers: Iterable[str] = (),
         class_name: str | None = None,
     ):
         self.method = method
-        self.arguments = arguments
+        # Stored as a tuple, the cached hash depends on it
+        self.arguments = tuple(arguments)
         self.return_type = return_type
-        self.modifiers = modifiers
+        self.modifiers = _intern_modifiers(modifiers)
         self.class_name = class_name
 
-    @staticmethod
-    def parse_arguments_string(data: str):
-        arguments: list[str] = []
-
-        is_in_class = False
-
-        tmp = ""
-        for c in data:
-            tmp += c
-
-            # Start of a fully qualified class name
-            if c == "L":
-                is_in_class = True
-                continue
+        self._hash = self._compute_hash()
 
-            # End of a fully qualified class name
-            if is_in_class and c == ";":
-                is_in_class = False
-                arguments.append(tmp)
-                tmp = ""
-                continue
+    def _compute_hash(self):
+        return hash((self.method, self.arguments, self.return_type, self.modifiers, self.class_name))
 
-            # Primitive type
-            if not is_in_class and c in "VZBSCIJFD":
-                arguments.append(tmp)
-                tmp = ""
-                continue
-
-        return arguments
+    @staticmethod
+    def parse_arguments_string(data: str):
+        return TYPE_DESCRIPTOR.findall(data)
 
     @staticmethod
     def parse_method_signature(data: str):
-        method_name = data.split("(")[0]
-        method_return_type = data.split(")")[1]
+        method_name, method_arguments, method_return_type = _parse_method_signature(data)
 
-        # Parse arguments
-        method_arguments_raw = data.split("(")[1].split(")")[0]
-        method_arguments = SmaliMethod.parse_arguments_string(method_arguments_raw)
-
-        return method_name, method_arguments, method_return_type
+        # Copy the cached arguments, callers own the returned list
+        return method_name, list(method_arguments), method_return_type
 
     @classmethod
     def from_string(cls, data: str, class_name: str | None = None):
         if not data.startswith(".method"):
             raise ValueError("Invalid method string")
 
-        parts = data.split()
+        return cls.from_parts(data.split(), class_name)
+
+    @classmethod
+    def from_parts(cls, parts: list[str], class_name: str | None = None):
+        if not parts or parts[0] != ".method":
+            raise ValueError("Invalid method string")
+
         method_signature = parts[-1]
         method_modifiers = parts[1:-1]
 
-        method_name, method_arguments, method_return_type = SmaliMethod.parse_method_signature(method_signature)
+        # The cached arguments tuple is shared as is, the instance never modifies it
+        method_name, method_arguments, method_return_type = _parse_method_signature(method_signature)
+
+        # Descriptors repeat across every class, share a single string for each of them
+        if class_name is not None:
+            class_name = sys.intern(class_name)
 
         return cls(method_name, method_arguments, method_return_type, method_modifiers, class_name)
 
     def to_smali(self):
         return f".method {' '.join(self.modifiers)} {self.method}({''.join(self.arguments)}){self.return_type}"
 
+    def to_signature(self):
+        return f"{self.method}({''.join(self.arguments)}){self.return_type}"
+
+    def to_reference(self):
+        return f"{self.class_name}->{self.to_signature()}"
+
     def __repr__(self):
         return f"SmaliMethod(method={self.method}, arguments={self.arguments}, return_type={self.return_type}, modifiers={self.modifiers}, class_name={self.class_name})"
 
@@ -160,5 +208,15 @@ class SmaliMethod:
             and self.class_name == other.class_name
         )
 
-    def __hash__(self):
-        return hash((self.method, tuple(self.arguments), self.return_type, tuple(self.modifiers), self.class_name))
+
+# The same few signatures are invoked over and over, parse each one only once
+@functools.lru_cache(maxsize=4096)
+def _parse_method_signature(data: str):
+    method_name = data.split("(")[0]
+    method_return_type = sys.intern(data.split(")")[1])
+
+    # Parse arguments
+    method_arguments_raw = data.split("(")[1].split(")")[0]
+    method_arguments = tuple(sys.intern(x) for x in SmaliMethod.parse_arguments_string(method_arguments_raw))
+
+    return method_name, method_arguments, method_return_type
@@ -12,38 +12,80 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import dataclasses
+import functools
 import re
+import sys
 from typing import Any
 
-# Regex components
-# CONST_WIDE_REGEX_PATTERN = r"const-wide(?:/16|/32|/high16)?"
-# CONST_REGEX_PATTERN = r"const(?:/4|/16|/high16)?"
-# CONST_VALUE_REGEX_PATTERN = r"-?0x[0-9a-f]+"
-# REGISTER_REGEX_PATTERN = r"([vp][0-9]+)"
-# FULLY_CLASSIFIED_NAME = r"L[a-zA-Z0-9$_\- /]+;"
-# SIMPLE_NAME = r"[a-zA-Z0-9$_\- ]+"
-# TYPE_DESCRIPTOR = r"\[*(?:" + FULLY_CLASSIFIED_NAME + r"|[VZBSCIJFD])"
-# STATIC_GET_PUT_FIELD_REGEX = r"(" + FULLY_CLASSIFIED_NAME + r")->(" + SIMPLE_NAME + r"):(" + TYPE_DESCRIPTOR + r")"
-
-CONST = re.compile(r"const(?:/4|/16|/high16|-wide(?:/16|/32|/high16)?)?\s+([vp][0-9]+),\s+(-?0x[0-9a-fA-F]+)")
-CONST_STRING = re.compile(r'const-string\s+([vp][0-9]+),\s+"(.+)"')
-NEW_ARRAY = re.compile(r"new-array\s+([vp][0-9]+),\s+([vp][0-9]+),\s+(\[*(?:L[a-zA-Z0-9$_\- /]+;|[VZBSCIJFD]))")
-AGET_APUT = re.compile(
-    r"a(?:put|get)(?:-(?:wide|object|boolean|byte|char|short))?\s+([vp][0-9]+),\s+([vp][0-9]+),\s+([vp][0-9]+)"
+# Regex components, shared so every pattern accepts the same registers and operand separators
+# Operands are separated by ASCII whitespace, re.ASCII keeps \s from checking the Unicode tables
+_REGISTER = r"([vp][0-9]+)"
+_SEPARATOR = r",\s+"
+
+CONST = re.compile(
+    r"const(?:/4|/16|/high16|-wide(?:/16|/32|/high16)?)?\s+" + _REGISTER + _SEPARATOR + r"(-?0x[0-9a-fA-F]+)", re.ASCII
 )
-SGET_SPUT = re.compile(
-    r"s(?:put|get)(?:-(?:wide|object|boolean|byte|char|short))?\s+([vp][0-9]+),\s+((L[a-zA-Z0-9$_\- /]+;)->([a-zA-Z0-9$_\- ]+):(\[*(?:L[a-zA-Z0-9$_\- /]+;|[VZBSCIJFD])))"
+
+# Operands of the instructions whose opcode is checked against a set first, the patterns have no alternation
+# The string spans from the first to the last quote, escaped quotes inside it are kept as they are
+CONST_STRING_OPERANDS = re.compile(_REGISTER + _SEPARATOR + r'"(.*)"', re.ASCII)
+AGET_APUT_OPERANDS = re.compile(_REGISTER + _SEPARATOR + _REGISTER + _SEPARATOR + _REGISTER, re.ASCII)
+
+# Opcodes matched by CONST
+CONST_OPCODES = frozenset(
+    [
+        "const",
+        "const/4",
+        "const/16",
+        "const/high16",
+        "const-wide",
+        "const-wide/16",
+        "const-wide/32",
+        "const-wide/high16",
+    ]
 )
-INVOKE_STATIC = re.compile(
-    r"invoke-static\s+{([vp][0-9]+(?:,\s*[vp][0-9]+)*)},\s+(L[a-zA-Z0-9$_\- /]+;)->([a-zA-Z0-9$_\- /\[\(\);]+)"
+
+# Opcodes parsed by SmaliInstrConstString
+CONST_STRING_OPCODES = frozenset(
+    [
+        "const-string",
+        "const-string/jumbo",
+    ]
 )
-MOVE_RESULT = re.compile(r"move-result(?:-(?:wide|object))?\s+([vp][0-9]+)")
 
+# Suffixes of the typed sget/sput and aget/aput opcodes
+TYPE_SUFFIXES = ["", "-wide", "-object", "-boolean", "-byte", "-char", "-short"]
+
+# Opcodes parsed by SmaliInstrSGetSPut
+SGET_SPUT_OPCODES = frozenset(f"{opcode}{suffix}" for opcode in ["sget", "sput"] for suffix in TYPE_SUFFIXES)
+
+# Opcodes parsed by SmaliInstrAGetAPut
+AGET_APUT_OPCODES = frozenset(f"{opcode}{suffix}" for opcode in ["aget", "aput"] for suffix in TYPE_SUFFIXES)
+
+# Opcodes parsed by SmaliInstrMoveResult
+MOVE_RESULT_OPCODES = frozenset(
+    [
+        "move-result",
+        "move-result-wide",
+        "move-result-object",
+    ]
+)
 
+
+def _is_register(data: str) -> bool:
+    return len(data) > 1 and data[0] in "vp" and data[1:].isdigit() and data.isascii()
+
+
+def _is_class_name(data: str) -> bool:
+    return len(data) > 2 and data[0] == "L" and data[-1] == ";"
+
+
+# parse_line() shares cached instances between callers, frozen keeps one caller from changing them for the others
+@dataclasses.dataclass(slots=True, frozen=True)
 class SmaliInstrConst:
-    def __init__(self, register: str, value: int):
-        self.register = register
-        self.value = value
+    register: str
+    value: int
 
     @staticmethod
     def parse(data: str):
@@ -53,185 +95,219 @@ class SmaliInstrConst:
         if not m:
             raise ValueError("Invalid const instruction")
 
-        register = m.group(1)
-        value = int(m.group(2), 0)
+        # Register and class names are used as dictionary keys, every instruction interns them
+        register = sys.intern(m.group(1))
 
-        return SmaliInstrConst(register, value)
+        # The regex only matches hexadecimal literals, skip the prefix instead of letting int() detect the base
+        literal = m.group(2)
+        value = -int(literal[3:], 16) if literal[0] == "-" else int(literal[2:], 16)
 
-    def __eq__(self, other: Any):
-        if not isinstance(self, other.__class__):
-            return NotImplemented
-
-        return self.register == other.register and self.value == other.value
+        return SmaliInstrConst(register, value)
 
 
+@dataclasses.dataclass(slots=True, frozen=True)
 class SmaliInstrConstString:
-    def __init__(self, register: str, value: str):
-        self.register = register
-        self.value = value
+    register: str
+    value: str
 
     @staticmethod
     def parse(data: str):
         data = data.strip()
 
-        m = CONST_STRING.match(data)
+        parts = data.split(None, 1)
+        if len(parts) != 2 or parts[0] not in CONST_STRING_OPCODES:
+            raise ValueError("Invalid const-string instruction")
+
+        m = CONST_STRING_OPERANDS.match(parts[1])
         if not m:
             raise ValueError("Invalid const-string instruction")
 
-        register = m.group(1)
+        register = sys.intern(m.group(1))
         value = m.group(2)
 
         return SmaliInstrConstString(register, value)
 
-    def __eq__(self, other: Any):
-        if not isinstance(self, other.__class__):
-            return NotImplemented
-
-        return self.register == other.register and self.value == other.value
-
 
+@dataclasses.dataclass(slots=True, frozen=True)
 class SmaliInstrInvokeStatic:
-    def __init__(self, registers: list[str], class_name: str, method: str):
-        self.registers = registers
-        self.class_name = class_name
-        self.method = method
+    registers: tuple[str, ...]
+    class_name: str
+    method: str
 
     @staticmethod
     def parse(data: str):
         data = data.strip()
 
-        m = INVOKE_STATIC.match(data)
-        if not m:
+        # The register list and the method reference are split on their markers instead of matched with a regex
+        parts = data.split(None, 1)
+        if len(parts) != 2 or parts[0] != "invoke-static" or parts[1][:1] != "{":
             raise ValueError("Invalid invoke-static instruction")
 
-        registers = [x.strip() for x in m.group(1).split(",")]
-        class_name = m.group(2)
-        method = m.group(3)
+        register_list, _, method = parts[1][1:].partition("}")
+        class_name, _, method = method.lstrip(", \t").partition("->")
 
-        return SmaliInstrInvokeStatic(registers, class_name, method)
+        # Registers are separated by ", " in baksmali output, other spacing takes the slower path
+        registers = register_list.split(", ")
+        if not all(_is_register(x) for x in registers):
+            registers = [x.strip() for x in register_list.split(",")]
+
+        if not (all(_is_register(x) for x in registers) and _is_class_name(class_name) and "(" in method):
+            raise ValueError("Invalid invoke-static instruction")
 
-    def __eq__(self, other: Any):
-        if not isinstance(self, other.__class__):
-            return NotImplemented
+        registers = tuple(map(sys.intern, registers))
+        class_name = sys.intern(class_name)
 
-        return self.registers == other.registers and self.class_name == other.class_name and self.method == other.method
+        return SmaliInstrInvokeStatic(registers, class_name, method)
 
 
+@dataclasses.dataclass(slots=True, frozen=True)
 class SmaliInstrNewArray:
-    def __init__(self, register: str, size_register: str, type_descriptor: str):
-        self.register = register
-        self.size_register = size_register
-        self.type_descriptor = type_descriptor
+    register: str
+    size_register: str
+    type_descriptor: str
 
     @staticmethod
     def parse(data: str):
         data = data.strip()
 
-        m = NEW_ARRAY.match(data)
-        if not m:
+        # Operands are split by hand, new-array lines are too simple to need a regex
+        parts = data.split(None, 1)
+        if len(parts) != 2 or parts[0] != "new-array":
             raise ValueError("Invalid new-array instruction")
 
-        register = m.group(1)
-        size_register = m.group(2)
-        type_descriptor = m.group(3)
+        operands = parts[1].split(",")
+        if len(operands) != 3:
+            raise ValueError("Invalid new-array instruction")
 
-        return SmaliInstrNewArray(register, size_register, type_descriptor)
+        # The arity is fixed, unpack and strip each operand instead of going through a generator
+        register, size_register, type_descriptor = operands
+        register = register.strip()
+        size_register = size_register.strip()
+        type_descriptor = type_descriptor.strip()
+
+        if not (_is_register(register) and _is_register(size_register) and type_descriptor[:1] == "["):
+            raise ValueError("Invalid new-array instruction")
 
-    def __eq__(self, other: Any):
-        if not isinstance(self, other.__class__):
-            return NotImplemented
+        register = sys.intern(register)
+        size_register = sys.intern(size_register)
+        type_descriptor = sys.intern(type_descriptor)
 
-        return (
-            self.register == other.register
-            and self.size_register == other.size_register
-            and self.type_descriptor == other.type_descriptor
-        )
+        return SmaliInstrNewArray(register, size_register, type_descriptor)
 
 
+@dataclasses.dataclass(slots=True, frozen=True)
 class SmaliInstrAGetAPut:
-    def __init__(self, register_dest: str, register_array: str, register_index: str):
-        self.register_dest = register_dest
-        self.register_array = register_array
-        self.register_index = register_index
+    register_dest: str
+    register_array: str
+    register_index: str
 
     @staticmethod
     def parse(data: str):
         data = data.strip()
 
-        m = AGET_APUT.match(data)
+        # The opcode is looked up in a set, only the registers are left to the regex
+        parts = data.split(None, 1)
+        if len(parts) != 2 or parts[0] not in AGET_APUT_OPCODES:
+            raise ValueError("Invalid aget/aput instruction")
+
+        m = AGET_APUT_OPERANDS.match(parts[1])
         if not m:
             raise ValueError("Invalid aget/aput instruction")
 
-        register_dest = m.group(1)
-        register_array = m.group(2)
-        register_index = m.group(3)
+        register_dest = sys.intern(m.group(1))
+        register_array = sys.intern(m.group(2))
+        register_index = sys.intern(m.group(3))
 
         return SmaliInstrAGetAPut(register_dest, register_array, register_index)
 
-    def __eq__(self, other: Any):
-        if not isinstance(self, other.__class__):
-            return NotImplemented
-
-        return (
-            self.register_dest == other.register_dest
-            and self.register_array == other.register_array
-            and self.register_index == other.register_index
-        )
-
 
+@dataclasses.dataclass(slots=True, frozen=True)
 class SmaliInstrSGetSPut:
-    def __init__(self, register_dest: str, class_name: str, field_name: str, field_type: str):
-        self.register_dest = register_dest
-        self.class_name = class_name
-        self.field_name = field_name
-        self.field_type = field_type
+    register_dest: str
+    class_name: str
+    field_name: str
+    field_type: str
 
     @staticmethod
     def parse(data: str):
         data = data.strip()
 
-        m = SGET_SPUT.match(data)
-        if not m:
+        # The field reference is split on its markers, a regex would backtrack over the long character classes
+        parts = data.split(None, 1)
+        if len(parts) != 2 or parts[0] not in SGET_SPUT_OPCODES:
             raise ValueError("Invalid sget/sput instruction")
 
-        register_dest = m.group(1)
-        # full_field = m.group(2)
-        class_name = m.group(3)
-        field_name = m.group(4)
-        field_type = m.group(5)
+        register_dest, _, field = parts[1].partition(",")
+        class_name, _, field = field.strip().partition("->")
+        field_name, _, field_type = field.rpartition(":")
+        register_dest = register_dest.strip()
 
-        return SmaliInstrSGetSPut(register_dest, class_name, field_name, field_type)
+        if not (_is_register(register_dest) and _is_class_name(class_name) and field_name and field_type):
+            raise ValueError("Invalid sget/sput instruction")
 
-    def __eq__(self, other: Any):
-        if not isinstance(self, other.__class__):
-            return NotImplemented
+        register_dest = sys.intern(register_dest)
+        class_name = sys.intern(class_name)
+        field_type = sys.intern(field_type)
 
-        return (
-            self.register_dest == other.register_dest
-            and self.class_name == other.class_name
-            and self.field_name == other.field_name
-            and self.field_type == other.field_type
-        )
+        return SmaliInstrSGetSPut(register_dest, class_name, field_name, field_type)
 
 
+@dataclasses.dataclass(slots=True, frozen=True)
 class SmaliInstrMoveResult:
-    def __init__(self, register: str):
-        self.register = register
+    register: str
 
     @staticmethod
     def parse(data: str):
         data = data.strip()
 
-        m = MOVE_RESULT.match(data)
-        if not m:
+        parts = data.split()
+        if len(parts) != 2 or parts[0] not in MOVE_RESULT_OPCODES or not _is_register(parts[1]):
             raise ValueError("Invalid move-result instruction")
 
-        register = m.group(1)
+        register = sys.intern(parts[1])
 
         return SmaliInstrMoveResult(register)
 
-    def __eq__(self, other: Any):
-        if not isinstance(self, other.__class__):
-            return NotImplemented
 
-        return self.register == other.register
+# Instruction class for every supported opcode, a single lookup on the first token selects the parser to run
+OPCODE_DISPATCH: dict[str, Any] = {
+    **{opcode: SmaliInstrConst for opcode in CONST_OPCODES},
+    **{opcode: SmaliInstrConstString for opcode in CONST_STRING_OPCODES},
+    **{opcode: SmaliInstrSGetSPut for opcode in SGET_SPUT_OPCODES},
+    **{opcode: SmaliInstrAGetAPut for opcode in AGET_APUT_OPCODES},
+    **{opcode: SmaliInstrMoveResult for opcode in MOVE_RESULT_OPCODES},
+    "invoke-static": SmaliInstrInvokeStatic,
+    "new-array": SmaliInstrNewArray,
+}
+
+
+def parse_line(line: str):
+    """
+    Parses a line of Smali code with the instruction class matching its opcode.
+
+    Results are cached, so identical lines return the same frozen instruction.
+
+    Args:
+        line (str): A single line of Smali code.
+
+    Returns:
+        The parsed instruction, or None if the opcode is not supported.
+
+    Raises:
+        ValueError: If the opcode is supported but the line is not a valid instruction.
+    """
+    return _parse_stripped_line(line.strip())
+
+
+# Smali files repeat the same instructions over and over, each distinct line is only parsed once
+@functools.lru_cache(maxsize=65536)
+def _parse_stripped_line(line: str):
+    parts = line.split(None, 1)
+    if not parts:
+        return None
+
+    instr_class = OPCODE_DISPATCH.get(parts[0])
+    if instr_class is None:
+        return None
+
+    return instr_class.parse(line)
@@ -13,18 +13,30 @@
 # limitations under the License.
 
 
-from abc import ABC, abstractmethod
+# Not an ABC on purpose: the parser runs isinstance checks on registers for most instructions,
+# and ABCMeta.__instancecheck__ is several times slower than the default check.
+# Every register type is described by class attributes instead of overridden methods.
+class SmaliRegister:
+    __slots__ = ("value",)
 
+    register_type: str
+    value_type: type
+    value_description: str
 
-class SmaliRegister(ABC):
     def __init__(self, value):
+        if type(self) is SmaliRegister:
+            raise TypeError("SmaliRegister cannot be instantiated, use one of its subclasses")
+
         self.value = value
-        self.validate_value(value)
 
-    @abstractmethod
+        # Values come from the instruction parsers, validation is skipped when running with python -O
+        if __debug__:
+            self.validate_value(value)
+
     def validate_value(self, value):
         """Validate the value for the specific type."""
-        pass
+        if not isinstance(value, self.value_type):
+            raise ValueError(f"For '{self.register_type}', value must be {self.value_description}")
 
     def __repr__(self):
         return f"{self.__class__.__name__}(value={self.value})"
@@ -33,39 +45,30 @@ class SmaliRegister(ABC):
         return self.value
 
     @classmethod
-    @abstractmethod
     def get_type(cls) -> str:
         """Return the type of the register."""
-        pass
+        return cls.register_type
 
 
 class SmaliRegisterConst(SmaliRegister):
-    def validate_value(self, value):
-        if not isinstance(value, int):
-            raise ValueError("For 'const', value must be an int")
+    __slots__ = ()
 
-    @classmethod
-    def get_type(cls):
-        return "const"
+    register_type = "const"
+    value_type = int
+    value_description = "an int"
 
 
 class SmaliRegisterArray(SmaliRegister):
-    def validate_value(self, value):
-        if not isinstance(value, list):
-            raise ValueError("For 'array', value must be a list")
-        # if not all(isinstance(item, str) for item in value):
-        #     raise ValueError("All elements in the 'array' value must be strings")
+    __slots__ = ()
 
-    @classmethod
-    def get_type(cls):
-        return "array"
+    register_type = "array"
+    value_type = list
+    value_description = "a list"
 
 
 class SmaliRegisterString(SmaliRegister):
-    def validate_value(self, value):
-        if not isinstance(value, str):
-            raise ValueError("For 'string', value must be a string")
+    __slots__ = ()
 
-    @classmethod
-    def get_type(cls):
-        return "string"
+    register_type = "string"
+    value_type = str
+    value_description = "a string"
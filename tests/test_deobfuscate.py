@@ -0,0 +1,54 @@
+# Copyright 2024 Giacomo Ferretti
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from paranoid_deobfuscator.commands import deobfuscate
+from paranoid_deobfuscator.smali import SmaliMethod
+
+TARGET_METHOD = SmaliMethod("a", ["J"], "Ljava/lang/String;", ["public", "static"], "La/b/C;")
+
+
+def test_deobfuscator_save_writes_utf8(tmp_path):
+    smali_file = tmp_path / "A.smali"
+    smali_file.write_bytes(b'const-string v0, "\xc3\xa8"\r\n')
+
+    content = smali_file.read_bytes().decode()
+    with deobfuscate.ParanoidSmaliDeobfuscator(smali_file, TARGET_METHOD, "", content) as deobfuscator:
+        for line in deobfuscator.file:
+            deobfuscator.update(line)
+
+    deobfuscator.save()
+
+    assert smali_file.read_bytes() == b'const-string v0, "\xc3\xa8"\n'
+    assert list(tmp_path.iterdir()) == [smali_file]
+
+
+def test_deobfuscator_save_removes_tmp_file_on_error(tmp_path, monkeypatch):
+    smali_file = tmp_path / "A.smali"
+    smali_file.write_text("nop\n")
+
+    def fail_replace(src, dst):
+        raise OSError("replace failed")
+
+    monkeypatch.setattr(deobfuscate.os, "replace", fail_replace)
+
+    with deobfuscate.ParanoidSmaliDeobfuscator(smali_file, TARGET_METHOD, "", "nop\n") as deobfuscator:
+        for line in deobfuscator.file:
+            deobfuscator.update(line)
+
+    with pytest.raises(OSError):
+        deobfuscator.save()
+
+    assert list(tmp_path.iterdir()) == [smali_file]
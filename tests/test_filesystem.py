@@ -0,0 +1,82 @@
+# Copyright 2024 Giacomo Ferretti
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pathlib
+
+from paranoid_deobfuscator.filesystem import find_smali_files
+
+
+def test_find_smali_files_skips_non_smali_directories(tmp_path):
+    for path in [
+        "smali/a/A.smali",
+        "smali_classes2/b/B.smali",
+        "res/values/R.smali",
+        "original/O.smali",
+        "Top.smali",
+    ]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).touch()
+
+    assert sorted(pathlib.Path(x).relative_to(tmp_path).as_posix() for x in find_smali_files(tmp_path)) == [
+        "smali/a/A.smali",
+        "smali_classes2/b/B.smali",
+    ]
+
+
+def test_find_smali_files_in_smali_assets_directory(tmp_path):
+    # apktool decodes dex files found outside the APK root into smali_<dir>
+    for path in ["smali/a/A.smali", "smali_assets/b/B.smali", "assets/C.smali"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).touch()
+
+    assert sorted(pathlib.Path(x).relative_to(tmp_path).as_posix() for x in find_smali_files(tmp_path)) == [
+        "smali/a/A.smali",
+        "smali_assets/b/B.smali",
+    ]
+
+
+def test_find_smali_files_without_smali_directories(tmp_path):
+    for path in ["a/A.smali", "b/c/C.smali", "b/c/C.txt"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).touch()
+
+    assert sorted(pathlib.Path(x).relative_to(tmp_path).as_posix() for x in find_smali_files(tmp_path)) == [
+        "a/A.smali",
+        "b/c/C.smali",
+    ]
+
+
+def test_find_smali_files_follows_file_symlinks(tmp_path):
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "A.smali").touch()
+    (tmp_path / "smali").mkdir()
+    (tmp_path / "smali" / "A.smali").symlink_to(tmp_path / "other" / "A.smali")
+
+    assert [pathlib.Path(x).relative_to(tmp_path).as_posix() for x in find_smali_files(tmp_path)] == [
+        "smali/A.smali",
+    ]
+
+
+def test_find_smali_files_in_smali_directory(tmp_path):
+    # A smali directory as target, its packages only start with "smali" by chance
+    for path in ["smali_utils/A.smali", "smalidemo/B.smali", "a/C.smali"]:
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).touch()
+
+    assert sorted(pathlib.Path(x).relative_to(tmp_path).as_posix() for x in find_smali_files(tmp_path)) == [
+        "a/C.smali",
+        "smali_utils/A.smali",
+        "smalidemo/B.smali",
+    ]
@@ -13,22 +13,63 @@
 # limitations under the License.
 
 
-import numpy as np
 import pytest
 
-from paranoid_deobfuscator.paranoid import DeobfuscatorHelper, RandomHelper, utils
+from paranoid_deobfuscator.paranoid import (
+    DeobfuscatorHelper,
+    ParanoidNotFoundError,
+    ParanoidSmaliParser,
+    ParanoidSmaliParserError,
+    RandomHelper,
+    find_calls_to_target_method,
+    find_candidates,
+    find_get_string_method,
+    utils,
+)
+from paranoid_deobfuscator.smali import SmaliMethod, register
 
 
 @pytest.mark.parametrize(
     "input, expected_result",
     [
-        ((-31289, 16, False), np.uint16(34247)),
+        ((-31289, 16, False), 34247),
+        ((-31289, 16, True), -31289),
+        ((65535, 16, True), 65535),
+        ((-1, 64, False), 0xFFFFFFFFFFFFFFFF),
+        ((0x7F, 8, False), 0x7F),
     ],
 )
 def test_paranoid_utils_to_int(input, expected_result):
     assert utils.to_int(*input) == expected_result
 
 
+@pytest.mark.parametrize(
+    "input",
+    [
+        (256, 8, True),
+        (-129, 8, False),
+        (1, 12, True),
+    ],
+)
+def test_invalid_paranoid_utils_to_int(input):
+    with pytest.raises(ValueError):
+        utils.to_int(*input)
+
+
+@pytest.mark.parametrize(
+    "input, expected_result",
+    [
+        (0x7FFF, 32767),
+        (0x8000, -32768),
+        (0xFFFF, -1),
+        (0x12345, 9029),
+        (-31289, -31289),
+    ],
+)
+def test_paranoid_RandomHelper_to_short(input, expected_result):
+    assert RandomHelper.to_short(input) == expected_result
+
+
 @pytest.mark.parametrize(
     "input, expected_result",
     [
@@ -36,7 +77,7 @@ def test_paranoid_utils_to_int(input, expected_result):
     ],
 )
 def test_paranoid_RandomHelper_seed(input, expected_result):
-    assert RandomHelper.seed(input).view(np.int64) == expected_result
+    assert RandomHelper.seed(input) == expected_result
 
 
 @pytest.mark.parametrize(
@@ -63,7 +104,7 @@ def test_paranoid_RandomHelper_seed(input, expected_result):
     ],
 )
 def test_paranoid_RandomHelper_rotl(input, expected_result):
-    assert RandomHelper.rotl(*input).view(np.int16) == expected_result
+    assert RandomHelper.rotl(*input) == expected_result
 
 
 @pytest.mark.parametrize(
@@ -78,7 +119,7 @@ def test_paranoid_RandomHelper_rotl(input, expected_result):
     ],
 )
 def test_paranoid_RandomHelper_next(input, expected_result):
-    assert RandomHelper.next(input).view(np.int64) == expected_result
+    assert RandomHelper.next(input) == expected_result
 
 
 @pytest.fixture
@@ -97,4 +138,160 @@ def test_paranoid_DeobfuscatorHelper_getString(paranoid_obfuscated_chunks, input
     assert DeobfuscatorHelper.getString(input, paranoid_obfuscated_chunks) == expected_result
 
 
-# TODO: add tests for ParanoidSmaliParser
+@pytest.mark.parametrize(
+    "input, expected_result",
+    [
+        (0, b"foo"),
+        (17179869184, b"bar"),
+    ],
+)
+def test_paranoid_DeobfuscatorHelper_getString_joined_chunks(paranoid_obfuscated_chunks, input, expected_result):
+    chunks = DeobfuscatorHelper.join_chunks(paranoid_obfuscated_chunks)
+    assert DeobfuscatorHelper.getString(input, chunks) == expected_result
+
+
+@pytest.mark.parametrize("input", [1 << 64, -(1 << 63) - 1])
+def test_invalid_paranoid_DeobfuscatorHelper_getString(paranoid_obfuscated_chunks, input):
+    with pytest.raises(ValueError):
+        DeobfuscatorHelper.getString(input, paranoid_obfuscated_chunks)
+
+
+def test_paranoid_DeobfuscatorHelper_getString_cached_on_id(paranoid_obfuscated_chunks):
+    chunks = DeobfuscatorHelper.join_chunks(paranoid_obfuscated_chunks)
+    decoder = DeobfuscatorHelper._cached_getString(chunks)
+    DeobfuscatorHelper.getString(0, chunks)
+    hits = decoder.cache_info().hits
+
+    assert DeobfuscatorHelper.getString(0, chunks) == b"foo"
+    assert decoder.cache_info().hits == hits + 1
+
+
+def test_paranoid_DeobfuscatorHelper_getString_across_chunks():
+    # The string starts two characters before the end of the first chunk
+    chunks = ["\u0000" * (DeobfuscatorHelper.MAX_CHUNK_LENGTH - 2) + "\u0003f", "oo"]
+    assert DeobfuscatorHelper.getString((DeobfuscatorHelper.MAX_CHUNK_LENGTH - 2) << 32, chunks) == b"foo"
+
+
+def test_paranoid_find_candidates_skips_files_without_string_arrays(tmp_path):
+    smali_file = tmp_path / "A.smali"
+    smali_file.write_text(".class public La/A;\n.field private static a:I\n")
+
+    assert find_candidates(str(smali_file)) == ([], [])
+
+
+def test_paranoid_find_candidates_keeps_unicode_line_separators(tmp_path):
+    smali_file = tmp_path / "A.smali"
+    smali_file.write_text(
+        ".class public La/A;\n"
+        ".field private static a:[Ljava/lang/String;\n"
+        ".method static constructor <clinit>()V\n"
+        "    const/4 v0, 0x1\n"
+        "    new-array v0, v0, [Ljava/lang/String;\n"
+        "    const/4 v1, 0x0\n"
+        '    const-string v2, "a\u2028b\x1cc"\n'
+        "    aput-object v2, v0, v1\n"
+        "    sput-object v0, La/A;->a:[Ljava/lang/String;\n"
+        "    const/4 v0, 0x0\n"
+        ".end method\n",
+        encoding="utf-8",
+    )
+
+    _, arrays = find_candidates(str(smali_file))
+    assert [value for _, value in arrays] == [["a\u2028b\x1cc"]]
+
+
+def test_paranoid_find_get_string_method_not_found(tmp_path):
+    smali_file = tmp_path / "A.smali"
+    smali_file.write_text(".class public La/A;\n.field private static a:I\n")
+
+    with pytest.raises(ParanoidNotFoundError):
+        find_get_string_method([str(smali_file)], jobs=1)
+
+
+def test_paranoid_find_calls_to_target_method(tmp_path):
+    target_method = SmaliMethod("getString", ["J"], "Ljava/lang/String;", ["public", "static"], "La/D;")
+    smali_file = tmp_path / "A.smali"
+    smali_file.write_text(
+        ".class public La/A;\n"
+        ".method public static a()V\n"
+        "    const-wide v0, 0x400000000L\n"
+        "    invoke-static {v0, v1}, La/D;->getString(J)Ljava/lang/String;\n"
+        "    const-wide v0, 0x1L\n"
+        "    invoke-static {v0, v1}, La/E;->getString(J)Ljava/lang/String;\n"
+        ".end method\n"
+    )
+
+    assert [x.value for x in find_calls_to_target_method(str(smali_file), target_method)] == [0x400000000]
+
+
+def test_paranoid_find_calls_to_target_method_error_line_num(tmp_path):
+    target_method = SmaliMethod("getString", ["J"], "Ljava/lang/String;", ["public", "static"], "La/D;")
+    smali_file = tmp_path / "A.smali"
+    smali_file.write_text(
+        ".class public La/A;\n"
+        ".method public static a()V\n"
+        "\n"
+        "    invoke-static {v0, v1}, La/D;->getString(J)Ljava/lang/String;\n"
+        ".end method\n"
+    )
+
+    with pytest.raises(ParanoidSmaliParserError) as e:
+        find_calls_to_target_method(str(smali_file), target_method)
+
+    assert e.value.extra["line_num"] == 4
+
+
+def test_paranoid_ParanoidSmaliParserError_str():
+    assert str(ParanoidSmaliParserError("Register not found")) == "Register not found"
+
+    error = ParanoidSmaliParserError("Register not found", {"registers": {"v0": register.SmaliRegisterConst(1)}})
+    assert str(error).splitlines() == [
+        "Register not found",
+        "{",
+        '    "registers": {',
+        '        "v0": "SmaliRegisterConst(value=1)"',
+        "    }",
+        "}",
+    ]
+    assert str(error) is str(error)
+
+
+def _parse_lines(lines, target_method=None):
+    smali_parser = ParanoidSmaliParser(filename="A.smali", target_method=target_method)
+    for line_num, line in enumerate(lines, 1):
+        smali_parser.update(line, line_num)
+
+    return smali_parser
+
+
+def test_paranoid_ParanoidSmaliParser_collects_each_call_once():
+    target_method = SmaliMethod("getString", ["J"], "Ljava/lang/String;", ["public", "static"], "La/D;")
+    smali_parser = _parse_lines(
+        [
+            ".class public La/A;",
+            ".method public static a()V",
+            "    const-wide v0, 0x2L",
+            "    invoke-static {v0, v1}, La/D;->getString(J)Ljava/lang/String;",
+            ".end method",
+        ],
+        target_method,
+    )
+
+    assert [x.value for x in smali_parser.state.calls_to_target_method] == [2]
+
+
+@pytest.mark.parametrize(
+    "lines, message",
+    [
+        (["    invoke-static {p0, p1}, La/D;->getString(J)Ljava/lang/String;"], "Parameters are not supported"),
+        (["    invoke-static {v0, v1}, La/D;->getString(J)Ljava/lang/String;"], "Register not found"),
+    ],
+)
+def test_paranoid_ParanoidSmaliParser_invalid_target_method_call(lines, message):
+    target_method = SmaliMethod("getString", ["J"], "Ljava/lang/String;", ["public", "static"], "La/D;")
+
+    with pytest.raises(ParanoidSmaliParserError) as e:
+        _parse_lines([".class public La/A;", ".method public static a()V", *lines], target_method)
+
+    assert e.value.args[0] == message
+    assert e.value.extra["line_num"] == 3
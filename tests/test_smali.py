@@ -12,10 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import dataclasses
+import pickle
+import sys
+
 import pytest
 
-from paranoid_deobfuscator.smali import SmaliField, SmaliMethod
+from paranoid_deobfuscator.smali import SmaliField, SmaliMethod, register
 from paranoid_deobfuscator.smali.instructions import (
+    CONST_OPCODES,
+    CONST_STRING_OPCODES,
+    OPCODE_DISPATCH,
     SmaliInstrAGetAPut,
     SmaliInstrConst,
     SmaliInstrConstString,
@@ -23,6 +30,7 @@ from paranoid_deobfuscator.smali.instructions import (
     SmaliInstrMoveResult,
     SmaliInstrNewArray,
     SmaliInstrSGetSPut,
+    parse_line,
 )
 
 
@@ -74,94 +82,155 @@ def test_valid_SmaliMethod_to_smali(input, expected_result):
     assert input.to_smali() == expected_result
 
 
+def test_valid_SmaliMethod_to_signature_and_reference():
+    method = SmaliMethod("getString", ["J"], "Ljava/lang/String;", ["public", "static"], "La/b/C;")
+
+    assert method.to_signature() == "getString(J)Ljava/lang/String;"
+    assert method.to_reference() == "La/b/C;->getString(J)Ljava/lang/String;"
+
+
 @pytest.mark.parametrize(
     "input, expected_result",
     [
-        (
-            ".field public static final A:[I",
-            SmaliField("A", "[I", ["public", "static", "final"]),
-        ),
-        (
-            ".field public static final F:[Ljava/lang/String;",
-            SmaliField("F", "[Ljava/lang/String;", ["public", "static", "final"]),
-        ),
-        (
-            ".field public static final H:[Ljava/lang/Object;",
-            SmaliField("H", "[Ljava/lang/Object;", ["public", "static", "final"]),
-        ),
-        (
-            ".field public static Q:Ljava/lang/reflect/Method;",
-            SmaliField("Q", "Ljava/lang/reflect/Method;", ["public", "static"]),
-        ),
-        (
-            ".field public static R:Z",
-            SmaliField("R", "Z", ["public", "static"]),
-        ),
-        (
-            ".field public static S:Ljava/lang/reflect/Field;",
-            SmaliField("S", "Ljava/lang/reflect/Field;", ["public", "static"]),
-        ),
-        (
-            ".field public static final b:[I",
-            SmaliField("b", "[I", ["public", "static", "final"]),
-        ),
-        (
-            ".field public static d:Ljava/lang/reflect/Field; = null",
-            SmaliField("d", "Ljava/lang/reflect/Field;", ["public", "static"], init_value="null"),
-        ),
-        (
-            ".field public static e:Z = false",
-            SmaliField("e", "Z", ["public", "static"], init_value="false"),
-        ),
+        ("", []),
+        ("J", ["J"]),
+        ("IJLjava/lang/String;Z", ["I", "J", "Ljava/lang/String;", "Z"]),
+        ("[I[[Ljava/lang/String;LFoo$Bar;", ["[I", "[[Ljava/lang/String;", "LFoo$Bar;"]),
     ],
 )
+def test_valid_SmaliMethod_parse_arguments_string(input, expected_result):
+    assert SmaliMethod.parse_arguments_string(input) == expected_result
+
+
+def test_SmaliMethod_parse_method_signature_returns_new_arguments():
+    first = SmaliMethod.parse_method_signature("a(JI)V")
+    first[1].append("Z")
+
+    assert SmaliMethod.parse_method_signature("a(JI)V") == ("a", ["J", "I"], "V")
+
+
+# Every case is checked in both directions, parsing the string and formatting the field back
+SMALI_FIELD_CASES = [
+    (".field public static final A:[I", SmaliField("A", "[I", ["public", "static", "final"])),
+    (
+        ".field public static final F:[Ljava/lang/String;",
+        SmaliField("F", "[Ljava/lang/String;", ["public", "static", "final"]),
+    ),
+    (
+        ".field public static final H:[Ljava/lang/Object;",
+        SmaliField("H", "[Ljava/lang/Object;", ["public", "static", "final"]),
+    ),
+    (
+        ".field public static Q:Ljava/lang/reflect/Method;",
+        SmaliField("Q", "Ljava/lang/reflect/Method;", ["public", "static"]),
+    ),
+    (".field public static R:Z", SmaliField("R", "Z", ["public", "static"])),
+    (
+        ".field public static S:Ljava/lang/reflect/Field;",
+        SmaliField("S", "Ljava/lang/reflect/Field;", ["public", "static"]),
+    ),
+    (".field public static final b:[I", SmaliField("b", "[I", ["public", "static", "final"])),
+    (
+        ".field public static d:Ljava/lang/reflect/Field; = null",
+        SmaliField("d", "Ljava/lang/reflect/Field;", ["public", "static"], init_value="null"),
+    ),
+    (".field public static e:Z = false", SmaliField("e", "Z", ["public", "static"], init_value="false")),
+]
+
+
+@pytest.mark.parametrize("input, expected_result", SMALI_FIELD_CASES)
 def test_valid_SmaliField_from_string(input, expected_result):
     assert SmaliField.from_string(input) == expected_result
 
 
+@pytest.mark.parametrize("expected_result, input", SMALI_FIELD_CASES)
+def test_valid_SmaliField_to_smali(input, expected_result):
+    assert input.to_smali() == expected_result
+
+
+def test_SmaliField_SmaliMethod_pickle():
+    field = SmaliField("a", "[Ljava/lang/String;", ["private", "static"], "La/b/C;")
+    method = SmaliMethod("getString", ["J"], "Ljava/lang/String;", ["public", "static"], "La/b/C;")
+
+    assert pickle.loads(pickle.dumps(field)) == field
+    assert hash(pickle.loads(pickle.dumps(field))) == hash(field)
+    assert pickle.loads(pickle.dumps(method)) == method
+    assert hash(pickle.loads(pickle.dumps(method))) == hash(method)
+
+
+def test_SmaliMethod_arguments_tuple():
+    arguments = ["J"]
+    method = SmaliMethod("getString", arguments, "Ljava/lang/String;", ["public", "static"], "La/b/C;")
+    arguments.append("I")
+
+    assert method.arguments == ("J",)
+    assert method in {SmaliMethod("getString", ["J"], "Ljava/lang/String;", ["public", "static"], "La/b/C;")}
+    assert repr(method) == (
+        "SmaliMethod(method=getString, arguments=('J',), return_type=Ljava/lang/String;, "
+        "modifiers=('public', 'static'), class_name=La/b/C;)"
+    )
+
+
+def test_SmaliField_SmaliMethod_slots():
+    assert not hasattr(SmaliField("a", "I"), "__dict__")
+    assert not hasattr(SmaliMethod("a"), "__dict__")
+
+
+def test_SmaliField_SmaliMethod_interned():
+    # Build the strings at runtime, literals would already be interned by the compiler
+    class_name = "".join(["La/b/", "C;"])
+    field = SmaliField.from_string(".field private static a:" + "".join(["[Ljava/lang/", "String;"]), class_name)
+    method = SmaliMethod.from_string(
+        ".method public static b(" + "".join(["Ljava/lang/", "Object;"]) + ")J", class_name
+    )
+
+    assert field.type is sys.intern("[Ljava/lang/String;")
+    assert field.class_name is sys.intern("La/b/C;")
+    assert method.arguments[0] is sys.intern("Ljava/lang/Object;")
+    assert method.return_type is sys.intern("J")
+    assert method.class_name is sys.intern("La/b/C;")
+
+
 @pytest.mark.parametrize(
-    "input, expected_result",
+    "instance",
     [
-        (
-            SmaliField("A", "[I", ["public", "static", "final"]),
-            ".field public static final A:[I",
-        ),
-        (
-            SmaliField("F", "[Ljava/lang/String;", ["public", "static", "final"]),
-            ".field public static final F:[Ljava/lang/String;",
-        ),
-        (
-            SmaliField("H", "[Ljava/lang/Object;", ["public", "static", "final"]),
-            ".field public static final H:[Ljava/lang/Object;",
-        ),
-        (
-            SmaliField("Q", "Ljava/lang/reflect/Method;", ["public", "static"]),
-            ".field public static Q:Ljava/lang/reflect/Method;",
-        ),
-        (
-            SmaliField("R", "Z", ["public", "static"]),
-            ".field public static R:Z",
-        ),
-        (
-            SmaliField("S", "Ljava/lang/reflect/Field;", ["public", "static"]),
-            ".field public static S:Ljava/lang/reflect/Field;",
-        ),
-        (
-            SmaliField("b", "[I", ["public", "static", "final"]),
-            ".field public static final b:[I",
-        ),
-        (
-            SmaliField("d", "Ljava/lang/reflect/Field;", ["public", "static"], init_value="null"),
-            ".field public static d:Ljava/lang/reflect/Field; = null",
-        ),
-        (
-            SmaliField("e", "Z", ["public", "static"], init_value="false"),
-            ".field public static e:Z = false",
-        ),
+        SmaliInstrConst("v0", 1),
+        SmaliInstrInvokeStatic(("v0", "v1"), "La/D;", "a(J)V"),
+        SmaliInstrMoveResult("v0"),
+        register.SmaliRegisterConst(1),
+        register.SmaliRegisterArray(["a", None]),
+        register.SmaliRegisterString("a"),
     ],
 )
-def test_valid_SmaliField_to_smali(input, expected_result):
-    assert input.to_smali() == expected_result
+def test_instructions_registers_slots(instance):
+    assert not hasattr(instance, "__dict__")
+
+
+@pytest.mark.parametrize(
+    "register_class, value",
+    [
+        (register.SmaliRegisterConst, "1"),
+        (register.SmaliRegisterArray, "a"),
+        (register.SmaliRegisterString, 1),
+    ],
+)
+def test_invalid_SmaliRegister_value(register_class, value):
+    with pytest.raises(ValueError):
+        register_class(value)
+
+
+def test_SmaliRegister_base_class():
+    with pytest.raises(TypeError):
+        register.SmaliRegister(1)
+
+    assert register.SmaliRegisterConst(1).get_type() == "const"
+    assert register.SmaliRegisterArray.get_type() == "array"
+
+
+def test_SmaliRegister_pickle():
+    # Registers collected by worker processes are pickled back to the main process
+    assert pickle.loads(pickle.dumps(register.SmaliRegisterConst(1))).value == 1
+    assert pickle.loads(pickle.dumps(register.SmaliRegisterArray(["a", None]))).value == ["a", None]
 
 
 @pytest.mark.parametrize(
@@ -181,6 +250,39 @@ def test_valid_SmaliInstrConst_parse(input, expected_result):
     assert SmaliInstrConst.parse(input) == expected_result
 
 
+@pytest.mark.parametrize(
+    "input, expected_result",
+    [
+        ("const/high16 v0, 0x3f800000    # 1.0f", SmaliInstrConst("v0", 0x3F800000)),
+        ("const-wide v0, -0x4010000000000000L    # -1.0", SmaliInstrConst("v0", -0x4010000000000000)),
+    ],
+)
+def test_edge_SmaliInstrConst_parse(input, expected_result):
+    assert SmaliInstrConst.parse(input) == expected_result
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        "const/4 v0",
+        "const/4 v0, 1",
+        "const/4 v0, 0x",
+        "const/4 v0, 0xg",
+        "const/4 v0 0x1",
+        "const/4 0x1, 0x1",
+        "const-class v0, La0/a;",
+    ],
+)
+def test_invalid_SmaliInstrConst_parse(input):
+    with pytest.raises(ValueError):
+        SmaliInstrConst.parse(input)
+
+
+@pytest.mark.parametrize("opcode", sorted(CONST_OPCODES))
+def test_valid_CONST_OPCODES(opcode):
+    assert SmaliInstrConst.parse(f"{opcode} v0, 0x1") == SmaliInstrConst("v0", 1)
+
+
 @pytest.mark.parametrize(
     "input, expected_result",
     [
@@ -205,6 +307,37 @@ def test_valid_SmaliInstrConstString_parse(input, expected_result):
     assert SmaliInstrConstString.parse(input) == expected_result
 
 
+@pytest.mark.parametrize(
+    "input, expected_result",
+    [
+        ('const-string v0, ""', SmaliInstrConstString("v0", "")),
+        ('const-string v0, "a\\"b"', SmaliInstrConstString("v0", 'a\\"b')),
+        ('const-string v0, "a, b"', SmaliInstrConstString("v0", "a, b")),
+    ],
+)
+def test_edge_SmaliInstrConstString_parse(input, expected_result):
+    assert SmaliInstrConstString.parse(input) == expected_result
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        "const-string v0",
+        'const-string v0, "a',
+        "const-string v0, a",
+        'const-string 0x1, "a"',
+    ],
+)
+def test_invalid_SmaliInstrConstString_parse(input):
+    with pytest.raises(ValueError):
+        SmaliInstrConstString.parse(input)
+
+
+@pytest.mark.parametrize("opcode", sorted(CONST_STRING_OPCODES))
+def test_valid_CONST_STRING_OPCODES(opcode):
+    assert SmaliInstrConstString.parse(f'{opcode} v0, "TAG"') == SmaliInstrConstString("v0", "TAG")
+
+
 # SmaliInstrInvokeStatic, SmaliInstrSGetSPut, SmaliInstrMoveResult
 @pytest.mark.parametrize(
     "input, expected_result",
@@ -227,6 +360,20 @@ def test_valid_SmaliInstrNewArray_parse(input, expected_result):
     assert SmaliInstrNewArray.parse(input) == expected_result
 
 
+@pytest.mark.parametrize(
+    "input",
+    [
+        "new-array v2, v0",
+        "new-array v2, 0x1, [I",
+        "new-array v2, v0, I",
+        "new-instance v2, Ljava/lang/Object;",
+    ],
+)
+def test_invalid_SmaliInstrNewArray_parse(input):
+    with pytest.raises(ValueError):
+        SmaliInstrNewArray.parse(input)
+
+
 @pytest.mark.parametrize(
     "input, expected_result",
     [
@@ -250,6 +397,20 @@ def test_valid_SmaliInstrAGetAPut_parse(input, expected_result):
     assert SmaliInstrAGetAPut.parse(input) == expected_result
 
 
+@pytest.mark.parametrize(
+    "input",
+    [
+        "aget v0, v1",
+        "aget v0, v1, 0x1",
+        "aget-long v0, v1, v2",
+        "iget v0, v1, v2",
+    ],
+)
+def test_invalid_SmaliInstrAGetAPut_parse(input):
+    with pytest.raises(ValueError):
+        SmaliInstrAGetAPut.parse(input)
+
+
 @pytest.mark.parametrize(
     "input, expected_result",
     [
@@ -262,6 +423,19 @@ def test_valid_SmaliInstrMoveResult_parse(input, expected_result):
     assert SmaliInstrMoveResult.parse(input) == expected_result
 
 
+@pytest.mark.parametrize(
+    "input",
+    [
+        "move-result",
+        "move-result 0x1",
+        "move-exception v0",
+    ],
+)
+def test_invalid_SmaliInstrMoveResult_parse(input):
+    with pytest.raises(ValueError):
+        SmaliInstrMoveResult.parse(input)
+
+
 # sget-boolean v0, La0/a;->d:Z
 # sget-object v0, La0/a;->c:Ljava/lang/reflect/Method;
 # sput-object v3, La0/a;->c:Ljava/lang/reflect/Method;
@@ -307,22 +481,90 @@ def test_valid_SmaliInstrSGetSPut_parse(input, expected_result):
     assert SmaliInstrSGetSPut.parse(input) == expected_result
 
 
+@pytest.mark.parametrize(
+    "input",
+    [
+        "sget-object v0",
+        "sget-object v0, La0/a;",
+        "sget-object v0, La0/a;->c",
+        "sget-object x0, La0/a;->c:I",
+        "iget-object v0, p0, La0/a;->c:I",
+    ],
+)
+def test_invalid_SmaliInstrSGetSPut_parse(input):
+    with pytest.raises(ValueError):
+        SmaliInstrSGetSPut.parse(input)
+
+
 @pytest.mark.parametrize(
     "input, expected_result",
     [
         (
             "invoke-static {v1, v4, v3}, Landroid/util/Log;->i(Ljava/lang/String;Ljava/lang/String;Ljava/lang/Throwable;)I",
             SmaliInstrInvokeStatic(
-                ["v1", "v4", "v3"],
+                ("v1", "v4", "v3"),
                 "Landroid/util/Log;",
                 "i(Ljava/lang/String;Ljava/lang/String;Ljava/lang/Throwable;)I",
             ),
         ),
         (
             "invoke-static {p0, v1}, Ljava/util/Arrays;->copyOf([II)[I",
-            SmaliInstrInvokeStatic(["p0", "v1"], "Ljava/util/Arrays;", "copyOf([II)[I"),
+            SmaliInstrInvokeStatic(("p0", "v1"), "Ljava/util/Arrays;", "copyOf([II)[I"),
+        ),
+        (
+            "invoke-static {v0,  v1}, La/D;->a(J)V",
+            SmaliInstrInvokeStatic(("v0", "v1"), "La/D;", "a(J)V"),
         ),
     ],
 )
 def test_valid_SmaliInstrInvokeStatic_parse(input, expected_result):
     assert SmaliInstrInvokeStatic.parse(input) == expected_result
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        "invoke-static {}, La/D;->a()V",
+        "invoke-static {v0, v1}, La/D;",
+        "invoke-static v0, La/D;->a(J)V",
+        "invoke-static/range {v0 .. v1}, La/D;->a(J)V",
+        "invoke-virtual {v0, v1}, La/D;->a(J)V",
+    ],
+)
+def test_invalid_SmaliInstrInvokeStatic_parse(input):
+    with pytest.raises(ValueError):
+        SmaliInstrInvokeStatic.parse(input)
+
+
+@pytest.mark.parametrize(
+    "input, expected_result",
+    [
+        ("    const/4 v0, 0x1", SmaliInstrConst("v0", 1)),
+        ('const-string v1, "TAG"', SmaliInstrConstString("v1", "TAG")),
+        ("aput-object v2, v0, v1", SmaliInstrAGetAPut("v2", "v0", "v1")),
+        (
+            "sput-object v0, La0/a;->c:[Ljava/lang/String;",
+            SmaliInstrSGetSPut("v0", "La0/a;", "c", "[Ljava/lang/String;"),
+        ),
+        ("move-result-object v0", SmaliInstrMoveResult("v0")),
+        ("const-class v0, La0/a;", None),
+        ("return-void", None),
+        ("", None),
+    ],
+)
+def test_parse_line(input, expected_result):
+    assert parse_line(input) == expected_result
+
+
+def test_parse_line_cache():
+    assert parse_line("    const/4 v0, 0x1") is parse_line("const/4 v0, 0x1")
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        parse_line("const/4 v0, 0x1").value = 2
+
+
+def test_OPCODE_DISPATCH():
+    assert OPCODE_DISPATCH["const-wide/16"] is SmaliInstrConst
+    assert OPCODE_DISPATCH["sget-object"] is SmaliInstrSGetSPut
+    assert OPCODE_DISPATCH["aget-wide"] is SmaliInstrAGetAPut
+    assert "const-class" not in OPCODE_DISPATCH